@@ -0,0 +1 @@
+"""Benchmarks of the Came Eti Domo integration."""
@@ -0,0 +1,260 @@
+"""Benchmark of the integration against the local eti/domo simulator.
+
+It runs the real ``async_setup_entry`` of the integration, with the light,
+switch, sensor and climate platforms, followed by a number of poll cycles,
+and reports for every size of the installation:
+
+* the http requests received by the simulator (status updates excluded),
+* the wall time of the setup and of the poll cycles,
+* the time the event loop was blocked.
+
+Before that it reports the time taken to import every module of the
+integration in a fresh interpreter, on top of the Home Assistant modules
+already loaded at startup.
+
+Run it from the root of the repository, with Home Assistant installed::
+
+    python -m benchmarks.bench --devices 10 100 1000 --cycles 10 --latency 0.005
+"""
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant
+
+from .simulator import DomoSimulator
+
+# The custom_components package lives in the root of the repository
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from custom_components.came.const import (  # noqa: E402 pylint: disable=wrong-import-position
+    CONF_HOST,
+    CONF_LIST_CACHE_TTL,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    DOMAIN,
+)
+
+# Interval of the probe measuring the event loop lag, in seconds
+PROBE_INTERVAL = 0.005
+# Lag above which the event loop is considered blocked, in seconds
+BLOCKED_THRESHOLD = 0.01
+
+# Modules loaded by Home Assistant before it loads an integration
+CORE_MODULES = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.entity",
+)
+# Modules of the integration, in the order Home Assistant loads them
+INTEGRATION_MODULES = (
+    "custom_components.came",
+    "custom_components.came.hub",
+    "custom_components.came.light",
+    "custom_components.came.switch",
+    "custom_components.came.sensor",
+    "custom_components.came.climate",
+    "custom_components.came.config_flow",
+)
+# Script timing the import of a module after the core modules
+IMPORT_SCRIPT = """
+import importlib, sys, time
+for module in sys.argv[2:]:
+    importlib.import_module(module)
+started = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print(time.perf_counter() - started)
+"""
+
+
+class LoopMonitor:
+    """Measure how long the event loop was unable to run a periodic probe."""
+
+    def __init__(self):
+        """Init the monitor."""
+        self.blocked_time = 0.0
+        self.max_lag = 0.0
+        self._task = None
+
+    def start(self):
+        """Start probing the event loop."""
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+
+    async def stop(self):
+        """Stop probing the event loop."""
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def reset(self):
+        """Forget the measures taken so far."""
+        self.blocked_time = 0.0
+        self.max_lag = 0.0
+
+    async def _probe(self):
+        """Sleep for a fixed interval and record how late the wake up is."""
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(PROBE_INTERVAL)
+            lag = time.perf_counter() - started - PROBE_INTERVAL
+            self.max_lag = max(self.max_lag, lag)
+            if lag > BLOCKED_THRESHOLD:
+                self.blocked_time += lag
+
+
+class Measure:
+    """Requests, wall time and blocked time of a phase of the benchmark."""
+
+    def __init__(self, simulator: DomoSimulator, monitor: LoopMonitor):
+        """Init the measure."""
+        self._simulator = simulator
+        self._monitor = monitor
+        self.requests = 0
+        self.wall_time = 0.0
+        self.blocked_time = 0.0
+        self.max_lag = 0.0
+
+    def __enter__(self):
+        """Start measuring."""
+        self._simulator.reset_counters()
+        self._monitor.reset()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        """Stop measuring."""
+        self.wall_time = time.perf_counter() - self._started
+        self.requests = self._simulator.total_requests
+        self.blocked_time = self._monitor.blocked_time
+        self.max_lag = self._monitor.max_lag
+
+
+async def async_setup_hass(config_dir: str):
+    """Create a minimal Home Assistant instance able to load the integration.
+
+    The integration is linked from the repository into the empty config
+    directory, so the topology saved by a run is not loaded by the next one.
+    """
+    os.symlink(
+        os.path.join(REPO_ROOT, "custom_components"),
+        os.path.join(config_dir, "custom_components"),
+    )
+    hass = HomeAssistant()
+    hass.config.config_dir = config_dir
+    # hass is never started, without the event async_stop would stop the loop of asyncio.run
+    hass._stopped = asyncio.Event()  # pylint: disable=protected-access
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    return hass
+
+
+async def async_run(devices: int, cycles: int, latency: float, config_dir: str):
+    """Benchmark an installation with the given number of devices."""
+    simulator = DomoSimulator(devices, latency)
+    runner, host = await simulator.async_start()
+    hass = await async_setup_hass(config_dir)
+    monitor = LoopMonitor()
+    monitor.start()
+
+    entry = config_entries.ConfigEntry(
+        version=1,
+        domain=DOMAIN,
+        title=simulator.serial,
+        data={CONF_HOST: host, CONF_USERNAME: "admin", CONF_PASSWORD: "admin"},
+        # the polls run back to back, a cached list would hide their requests
+        options={CONF_LIST_CACHE_TTL: 0},
+        source=config_entries.SOURCE_USER,
+        connection_class=config_entries.CONN_CLASS_LOCAL_PUSH,
+        system_options={},
+        unique_id=simulator.serial,
+    )
+
+    try:
+        with Measure(simulator, monitor) as setup:
+            await hass.config_entries.async_add(entry)
+            await hass.async_block_till_done()
+
+        coordinators = hass.data[DOMAIN][entry.entry_id].coordinators.values()
+        with Measure(simulator, monitor) as polls:
+            for _ in range(cycles):
+                await asyncio.gather(
+                    *[coordinator.async_refresh() for coordinator in coordinators]
+                )
+            await hass.async_block_till_done()
+
+        await hass.config_entries.async_unload(entry.entry_id)
+    finally:
+        await monitor.stop()
+        await hass.async_stop(force=True)
+        await runner.cleanup()
+
+    return setup, polls
+
+
+def measure_import(module: str, runs: int) -> float:
+    """Return the best time taken to import a module in a fresh interpreter."""
+    best = None
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT, module, *CORE_MODULES],
+            cwd=REPO_ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        elapsed = float(output.strip().splitlines()[-1])
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report_imports(runs: int):
+    """Print the import time of every module of the integration."""
+    print(f"import time, best of {runs}, core modules already loaded")
+    for module in INTEGRATION_MODULES:
+        print(f"{module:<40} {measure_import(module, runs) * 1000:>7.1f} ms")
+
+
+def report(devices: int, cycles: int, setup: Measure, polls: Measure):
+    """Print the measures of a run."""
+    print(
+        f"{devices:>7} | setup {setup.requests:>5} req {setup.wall_time * 1000:>9.1f} ms"
+        f" blocked {setup.blocked_time * 1000:>7.1f} ms"
+        f" | {cycles} polls {polls.requests:>6} req {polls.wall_time * 1000:>9.1f} ms"
+        f" blocked {polls.blocked_time * 1000:>7.1f} ms max lag {polls.max_lag * 1000:>6.1f} ms"
+    )
+
+
+def main():
+    """Run the benchmark for every requested size."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--import-runs", type=int, default=5, help="0 to skip the import times")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.import_runs:
+        report_imports(args.import_runs)
+    print(f"devices | latency {args.latency * 1000:.1f} ms per request")
+    for devices in args.devices:
+        # every size starts from an empty config directory, as a first setup
+        with tempfile.TemporaryDirectory() as config_dir:
+            setup, polls = asyncio.run(
+                async_run(devices, args.cycles, args.latency, config_dir)
+            )
+        report(devices, args.cycles, setup, polls)
+
+
+if __name__ == "__main__":
+    main()
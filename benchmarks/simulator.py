@@ -0,0 +1,303 @@
+"""Local stand-in for the json api of a Came eti/domo server.
+
+Run it standalone with::
+
+    python -m benchmarks.simulator --devices 100 --latency 0.02 --port 8080
+
+and point the integration to ``127.0.0.1:8080``.
+"""
+import argparse
+import asyncio
+import collections
+import json
+import logging
+
+from aiohttp import web
+
+_LOGGER = logging.getLogger(__name__)
+
+# Share of the devices assigned to every category
+CATEGORY_SHARES = {
+    "lights": 0.5,
+    "relays": 0.2,
+    "analogin": 0.15,
+    "thermoregulation": 0.15,
+}
+
+# Number of rooms of every floor and of lights of every room
+ROOMS_PER_FLOOR = 5
+LIGHTS_PER_ROOM = 8
+
+# Reasons of the refused requests
+REASON_WRONG_SL_COMMAND = 6
+REASON_WRONG_CLIENT = 8
+REASON_WRONG_COMMAND = 9
+
+
+class DomoSimulator:
+    """In memory eti/domo server with configurable size and latency."""
+
+    def __init__(self, devices: int = 100, latency: float = 0.0, long_poll_timeout: float = 30.0):
+        """Build the items of the simulated installation."""
+        self.latency = latency
+        self.long_poll_timeout = long_poll_timeout
+        # Number of requests received, by command name
+        self.requests = collections.Counter()
+        self.serial = "0000SIMULATOR"
+        self.season = "winter"
+
+        self._sessions = set()
+        self._next_id = 1
+        self._pending_updates = []
+        self._updated = asyncio.Event()
+
+        counts = {
+            category: max(1, int(devices * share))
+            for category, share in CATEGORY_SHARES.items()
+        }
+        act_id = 1
+
+        self.lights = {}
+        for _ in range(counts["lights"]):
+            index = len(self.lights)
+            room = index // LIGHTS_PER_ROOM
+            self.lights[act_id] = {
+                "act_id": act_id,
+                "name": f"Light {act_id}",
+                "floor_ind": room // ROOMS_PER_FLOOR,
+                "room_ind": room,
+                "status": 0,
+                "type": "STEP_STEP",
+            }
+            act_id += 1
+
+        self.relays = {}
+        for _ in range(counts["relays"]):
+            self.relays[act_id] = {"act_id": act_id, "name": f"Relay {act_id}", "status": 0}
+            act_id += 1
+
+        self.analogin = {}
+        for _ in range(counts["analogin"]):
+            self.analogin[act_id] = {
+                "act_id": act_id,
+                "name": f"Hygrometer {act_id}",
+                "value": 50,
+                "unit": "%",
+            }
+            act_id += 1
+
+        self.thermoregulation = {}
+        for _ in range(counts["thermoregulation"]):
+            self.thermoregulation[act_id] = {
+                "act_id": act_id,
+                "name": f"Zone {act_id}",
+                "status": 0,
+                "temp": 200,
+                "mode": 2,
+                "set_point": 210,
+                "season": self.season,
+                "hygro": 45,
+            }
+            act_id += 1
+
+    @property
+    def total_requests(self):
+        """Return the number of requests received, the status updates excluded"""
+        return sum(
+            count for command, count in self.requests.items()
+            if command != "status_update_req"
+        )
+
+    def reset_counters(self):
+        """Forget the requests received so far."""
+        self.requests.clear()
+
+    def make_app(self):
+        """Return the aiohttp application serving the api."""
+        app = web.Application()
+        app.router.add_get("/domo/", self._handle_get)
+        app.router.add_post("/domo/", self._handle_post)
+        return app
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0):
+        """Start serving and return the runner and the host:port to connect to."""
+        runner = web.AppRunner(self.make_app())
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        port = runner.addresses[0][1]
+        return runner, f"{host}:{port}"
+
+    def push_change(self, category: str, act_id: int, **fields):
+        """Change an item as if it was operated from the wall."""
+        item = getattr(self, category)[act_id]
+        item.update(fields)
+        self._notify(category, item)
+
+    async def _handle_get(self, request):
+        """Answer the availability check."""
+        self.requests["GET"] += 1
+        return web.Response(text="eti/domo simulator")
+
+    async def _handle_post(self, request):
+        """Answer a command."""
+        command = json.loads(request.query["command"])
+        sl_cmd = command["sl_cmd"]
+
+        if sl_cmd != "sl_data_req":
+            self.requests[sl_cmd] += 1
+            await self._delay()
+            if sl_cmd == "sl_registration_req":
+                return self._registration()
+            if sl_cmd == "sl_keep_alive_req":
+                return self._ack(command["sl_client_id"] in self._sessions, REASON_WRONG_CLIENT)
+            return self._ack(False, REASON_WRONG_SL_COMMAND)
+
+        appl_msg = command["sl_appl_msg"]
+        cmd_name = appl_msg["cmd_name"]
+        self.requests[cmd_name] += 1
+
+        if command["sl_client_id"] not in self._sessions:
+            await self._delay()
+            return self._ack(False, REASON_WRONG_CLIENT)
+
+        if cmd_name == "status_update_req":
+            return await self._status_update()
+
+        await self._delay()
+        handler = getattr(self, "_" + cmd_name, None)
+        if handler is None:
+            return self._ack(False, REASON_WRONG_COMMAND)
+        return web.json_response(dict(handler(appl_msg), sl_data_ack_reason=0))
+
+    async def _delay(self):
+        """Inject the configured latency."""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _registration(self):
+        """Open a new session."""
+        client_id = f"{self._next_id:08X}"
+        self._next_id += 1
+        self._sessions.add(client_id)
+        return web.json_response({"sl_client_id": client_id, "sl_data_ack_reason": 0})
+
+    @staticmethod
+    def _ack(success: bool, reason: int):
+        """Return an empty response with the given outcome."""
+        return web.json_response({"sl_data_ack_reason": 0 if success else reason})
+
+    async def _status_update(self):
+        """Hold the request until something changes or the timeout expires."""
+        if not self._pending_updates:
+            self._updated.clear()
+            try:
+                await asyncio.wait_for(self._updated.wait(), self.long_poll_timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        result, self._pending_updates = self._pending_updates, []
+        return web.json_response({"result": result, "sl_data_ack_reason": 0})
+
+    def _notify(self, category: str, item: dict):
+        """Queue the status update of an item."""
+        prefix = {
+            "lights": "light_switch_ind",
+            "relays": "relay_status_ind",
+            "analogin": "analogin_status_ind",
+            "thermoregulation": "thermo_zone_info_ind",
+        }[category]
+        self._pending_updates.append(dict(item, cmd_name=prefix))
+        self._updated.set()
+
+    def _feature_list_req(self, appl_msg):
+        """Return the features of the server."""
+        return {
+            "list": ["lights", "relays", "analogin", "thermoregulation"],
+            "serial": self.serial,
+        }
+
+    def _nested_light_list_req(self, appl_msg):
+        """Return the lights nested in floors and rooms."""
+        floors = {}
+        for light in self.lights.values():
+            floor = floors.setdefault(
+                light["floor_ind"],
+                {"floor_ind": light["floor_ind"], "name": f"Floor {light['floor_ind']}", "rooms": {}},
+            )
+            room = floor["rooms"].setdefault(
+                light["room_ind"],
+                {"room_ind": light["room_ind"], "name": f"Room {light['room_ind']}", "array": []},
+            )
+            room["array"].append(dict(light))
+
+        return {
+            "array": [
+                {
+                    "floor_ind": floor["floor_ind"],
+                    "name": floor["name"],
+                    "array": list(floor["rooms"].values()),
+                }
+                for floor in floors.values()
+            ]
+        }
+
+    def _relays_list_req(self, appl_msg):
+        """Return the relays."""
+        return {"array": [dict(relay) for relay in self.relays.values()]}
+
+    def _analogin_list_req(self, appl_msg):
+        """Return the analog inputs."""
+        return {"array": [dict(sensor) for sensor in self.analogin.values()]}
+
+    def _thermo_list_req(self, appl_msg):
+        """Return the thermo zones."""
+        return {"array": [dict(zone) for zone in self.thermoregulation.values()]}
+
+    def _light_switch_req(self, appl_msg):
+        """Switch a light."""
+        self.push_change("lights", appl_msg["act_id"], status=appl_msg["wanted_status"])
+        return {}
+
+    def _relay_activation_req(self, appl_msg):
+        """Switch a relay."""
+        self.push_change("relays", appl_msg["act_id"], status=appl_msg["wanted_status"])
+        return {}
+
+    def _thermo_zone_config_req(self, appl_msg):
+        """Configure a thermo zone."""
+        self.push_change(
+            "thermoregulation",
+            appl_msg["act_id"],
+            mode=appl_msg["mode"],
+            set_point=appl_msg["set_point"],
+            status=0 if appl_msg["mode"] == 0 else 1,
+        )
+        return {}
+
+    def _thermo_season_req(self, appl_msg):
+        """Change the season of every thermo zone."""
+        self.season = appl_msg["season"]
+        for zone in self.thermoregulation.values():
+            zone["season"] = self.season
+        self._pending_updates.append({"cmd_name": "thermo_season_ind", "season": self.season})
+        self._updated.set()
+        return {}
+
+
+def main():
+    """Serve the simulator until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    simulator = DomoSimulator(args.devices, args.latency)
+    web.run_app(simulator.make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,12 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 import homeassistant.helpers.config_validation as cv
 
-from .const import DOMAIN, CONF_HOST, CONF_PASSWORD, CONF_USERNAME
-
-from .config_flow import ConfigFlow
-
-from eti_domo import Domo, ServerNotFound
+from .const import (
+    DOMAIN,
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+)
 
 import logging
 _LOGGER = logging.getLogger(__name__)
@@ -29,10 +30,6 @@ CONFIG_SCHEMA = vol.Schema(
     extra=vol.ALLOW_EXTRA,
 )
 
-# TODO List the platforms that you want to support.
-# For your initial PR, limit it to 1 platform.
-PLATFORMS = ["light", "switch", "sensor", "climate"]
-
 
 async def async_setup(hass: HomeAssistant, config: dict):
     """Set up the Came Eti Domo component."""
@@ -42,29 +39,28 @@ async def async_setup(hass: HomeAssistant, config: dict):
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up Came Eti Domo from a config entry."""
-    # TODO Store an API object for your platforms to access
-    # hass.data[DOMAIN][entry.entry_id] = MyApi(...)
+    # the client is loaded only when a server is configured,
+    # and the config flow only when home assistant asks for it
+    from .hub import CameHub  # pylint: disable=import-outside-toplevel
+    from .services import async_register_services  # pylint: disable=import-outside-toplevel
 
     # create an entry into the hass object
     if DOMAIN not in hass.data:
         hass.data[DOMAIN] = {}
 
-    # get info from entry 
-    username = entry.data[CONF_USERNAME]
-    password = entry.data[CONF_PASSWORD]
-    host = entry.data[CONF_HOST]
+    # every config entry has its own hub, so several servers can be configured
+    hub = CameHub(hass, entry)
+    await hub.async_setup()
+    hass.data[DOMAIN][entry.entry_id] = hub
 
-    # create a new Domo object
-    hub = Domo(host)
-    # login to the server
-    hub.login(username, password)
+    # switch the lights of a room, a floor or of the whole installation
+    async_register_services(hass)
 
-    # save the session info into the hass object
-    hass.data[DOMAIN]["hub"] = hub
-    # set up entry id
-    hass.data[DOMAIN][entry.entry_id] = hub.id
+    # apply the new polling intervals when the options change, the entry outlives the hub
+    hub.async_on_unload(entry.add_update_listener(async_reload_entry))
 
-    for component in PLATFORMS:
+    # only the platforms of the categories supported by the server are loaded
+    for component in hub.platforms:
         hass.async_create_task(
             hass.config_entries.async_forward_entry_setup(entry, component)
         )
@@ -72,18 +68,34 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     return True
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Delete the topology cached for a removed config entry."""
+    from .topology import CameTopology  # pylint: disable=import-outside-toplevel
+
+    # the topology is keyed by the serial of the server, as in the hub
+    await CameTopology(hass, entry.unique_id or entry.entry_id).async_remove()
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Reload a config entry after its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload a config entry."""
     unload_ok = all(
         await asyncio.gather(
             *[
                 hass.config_entries.async_forward_entry_unload(entry, component)
-                for component in PLATFORMS
+                for component in hass.data[DOMAIN][entry.entry_id].platforms
             ]
         )
     )
     if unload_ok:
-        hass.data[DOMAIN].pop("hub")
-        hass.data[DOMAIN].pop(entry.entry_id)
+        from .services import async_unregister_services  # pylint: disable=import-outside-toplevel
+
+        await hass.data[DOMAIN].pop(entry.entry_id).async_unload()
+        if not hass.data[DOMAIN]:
+            async_unregister_services(hass)
 
     return unload_ok
@@ -0,0 +1,448 @@
+"""Asynchronous client for the Came eti/domo json api."""
+import asyncio
+import json
+import logging
+import time
+
+import aiohttp
+
+from .breaker import STATE_CLOSED, CircuitBreaker
+from .cache import ListCache
+from .metrics import RequestMetrics
+from .scheduler import PRIORITY_COMMAND, PRIORITY_REFRESH, RequestScheduler
+from .snapshot import decode_light
+
+_LOGGER = logging.getLogger(__name__)
+
+# Timeout of a single http request to the server, in seconds
+REQUEST_TIMEOUT = 10
+# Timeout of a status update request, the server holds it until something changes
+STATUS_UPDATE_TIMEOUT = 60
+# Time after which the server drops an idle session, in seconds
+SESSION_TIMEOUT = 300
+# Idle time after which a keep alive is sent to save the session, in seconds
+KEEP_ALIVE_AFTER = SESSION_TIMEOUT - 60
+# Reasons of the refused requests telling the session is missing or expired
+SESSION_REASONS = (
+    7,  # no client id in the request
+    8,  # wrong client id in the request
+)
+
+
+class RequestError(Exception):
+    """Raised when the server refuses a request."""
+
+
+class ServerNotFound(Exception):
+    """Raised when the server is not reachable."""
+
+
+class CircuitOpen(ServerNotFound):
+    """Raised without sending the request while the server is known to be unreachable."""
+
+
+class CommandNotFound(Exception):
+    """Raised when the requested command does not exist."""
+
+
+class DomoClient:
+    """Asyncio client of an eti/domo server.
+
+    It exposes the same commands of the eti_domo library, but every request
+    goes through the given aiohttp session so nothing blocks the event loop.
+    When a scheduler is given, every request but the status updates waits
+    for its turn in the scheduler, the commands before the refreshes. When
+    metrics are given, the latency, size and outcome of every request are
+    recorded in them. When a circuit breaker is given, the requests fail at
+    once while the server is known to be unreachable. When a cache is given,
+    the list requests are shared among their callers and the commands
+    invalidate the lists of the items they change.
+    """
+
+    # Header for every http request made to the server
+    header = {
+        "Content-Type": "application/x-www-form-urlencoded",
+        "Connection": "Keep-Alive",
+    }
+
+    # Dictionary of available commands
+    available_commands = {
+        "update": "status_update_req",
+        "relays": "relays_list_req",
+        "cameras": "tvcc_cameras_list_req",
+        "timers": "timers_list_req",
+        "thermoregulation": "thermo_list_req",
+        "analogin": "analogin_list_req",
+        "digitalin": "digitalin_list_req",
+        "lights": "nested_light_list_req",
+        "features": "feature_list_req",
+        "users": "sl_users_list_req",
+        "maps": "map_descr_req",
+    }
+
+    # Object hooks of the json decoder building the records while parsing, cmd_name -> hook
+    object_hooks = {
+        "nested_light_list_req": decode_light,
+    }
+
+    # Dictionary of seasons available
+    seasons = {
+        "off": "plant_off",
+        "winter": "winter",
+        "summer": "summer",
+    }
+
+    # Dictionary of thermo zone status
+    thermo_status = {
+        0: "off",
+        1: "man",
+        2: "auto",
+        3: "jolly",
+    }
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        host: str,
+        scheduler: RequestScheduler = None,
+        metrics: RequestMetrics = None,
+        breaker: CircuitBreaker = None,
+        cache: ListCache = None,
+    ):
+        """Init the client of the server at the given ip address."""
+        # Wrap the host ip in a http url
+        self._url = "http://" + host + "/domo/"
+        self._session = session
+        self._scheduler = scheduler
+        self._metrics = metrics
+        self._breaker = breaker
+        self._cache = cache
+        # The sequence start from 1
+        self._cseq = 1
+        # Session id for the client
+        self.id = ""
+        # Credentials used to login again when the session expires
+        self._credentials = None
+        # Time of the last request accepted by the server
+        self._last_activity = 0.0
+        # Only one coroutine at a time can renew the session
+        self._login_lock = asyncio.Lock()
+
+    @property
+    def host(self):
+        """Return the url of the server"""
+        return self._url
+
+    @property
+    def idle_time(self):
+        """Return the seconds elapsed since the server accepted a request"""
+        return time.monotonic() - self._last_activity
+
+    async def check_connection(self):
+        """Check that the server is available.
+
+        :raises ServerNotFound: if the server is not reachable
+        """
+        try:
+            async with self._session.get(
+                self._url, headers=self.header, timeout=REQUEST_TIMEOUT
+            ) as response:
+                if response.status != 200:
+                    raise ServerNotFound
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise ServerNotFound from err
+
+    async def login(self, username: str, password: str) -> bool:
+        """Login to the server and save the session id.
+
+        :return: True if the server accepted the credentials
+        """
+        response = await self._scheduled_post(
+            lambda: {"sl_cmd": "sl_registration_req", "sl_login": username, "sl_pwd": password},
+            priority=PRIORITY_COMMAND,
+        )
+
+        # Set the client id for the session
+        self.id = response.get("sl_client_id", "")
+
+        if response["sl_data_ack_reason"] != 0:
+            return False
+
+        # Remember the credentials to renew the session when it expires
+        self._credentials = (username, password)
+        self._last_activity = time.monotonic()
+
+        return True
+
+    async def keep_alive(self) -> bool:
+        """Keep the session of the client alive."""
+        response = await self._scheduled_post(
+            lambda: {"sl_client_id": self.id, "sl_cmd": "sl_keep_alive_req"}
+        )
+
+        if response["sl_data_ack_reason"] != 0:
+            return False
+
+        self._last_activity = time.monotonic()
+
+        return True
+
+    async def async_keep_alive_if_needed(self):
+        """Save the session only when it is close to expiring.
+
+        Every accepted request already keeps the session alive, so the keep
+        alive is sent only after a long idle time. If the session already
+        expired, login again.
+        """
+        if self._credentials is None or self.idle_time < KEEP_ALIVE_AFTER:
+            return
+
+        if not await self.keep_alive():
+            await self._async_relogin(self.id)
+
+    async def list_request(self, cmd_name: str) -> dict:
+        """Retrieve the list of items identified by the command name.
+
+        :raises CommandNotFound: if the command does not exist
+        :raises RequestError: if the server refuses the request
+        """
+        # Check if the command exists
+        if cmd_name not in self.available_commands.values():
+            raise CommandNotFound
+
+        if self._cache is None:
+            return await self._list_request(cmd_name)
+        return await self._cache.async_get(cmd_name, lambda: self._list_request(cmd_name))
+
+    async def _list_request(self, cmd_name: str) -> dict:
+        """Send the list request identified by the command name."""
+        # The list of users is not a domo application message
+        if cmd_name == "sl_users_list_req":
+            return await self._data_request(
+                lambda: {"sl_client_id": self.id, "sl_cmd": "sl_users_list_req"},
+                name=cmd_name,
+            )
+
+        appl_msg = {}
+        # If the user requested the map, then we don't need to pass the client id
+        if cmd_name != "map_descr_req":
+            appl_msg["client"] = self.id
+        appl_msg["cmd_name"] = cmd_name
+
+        return await self._appl_request(appl_msg)
+
+    async def status_update(self) -> list:
+        """Wait for the status changes of the items.
+
+        The server holds the request open until an item changes, then
+        replies with the list of the changed items. The request does not go
+        through the scheduler, it would hold a slot for the whole wait.
+        :raises RequestError: if the server refuses the request
+        """
+        response = await self._appl_request(
+            {"client": self.id, "cmd_name": self.available_commands["update"]},
+            timeout=STATUS_UPDATE_TIMEOUT,
+            priority=None,
+        )
+
+        return response.get("result", [])
+
+    async def switch(self, act_id: int, status: bool = True, is_light: bool = True) -> dict:
+        """Turn on or off a light or a relay.
+
+        :raises RequestError: if the server refuses the request
+        """
+        try:
+            return await self._appl_request(
+                {
+                    "act_id": act_id,
+                    "client": self.id,
+                    "cmd_name": "light_switch_req" if is_light else "relay_activation_req",
+                    "wanted_status": 1 if status else 0,
+                },
+                priority=PRIORITY_COMMAND,
+            )
+        finally:
+            self.invalidate_list("lights" if is_light else "relays")
+
+    async def thermo_mode(self, act_id: int, mode: int, temp: float) -> dict:
+        """Change the mode and the set point of a thermo zone.
+
+        :param mode: 0 Turned off, 1 Manual mode, 2 Auto mode, 3 Jolly mode
+        :raises RequestError: if the mode does not exist or the server refuses the request
+        """
+        # Check if the mode exists
+        if mode not in self.thermo_status:
+            raise RequestError
+
+        try:
+            return await self._appl_request(
+                {
+                    "act_id": act_id,
+                    "client": self.id,
+                    "cmd_name": "thermo_zone_config_req",
+                    "extended_infos": 0,
+                    "mode": mode,
+                    # The server wants tenths of Celsius degree
+                    "set_point": int(round(temp * 10, 1)),
+                },
+                priority=PRIORITY_COMMAND,
+            )
+        finally:
+            self.invalidate_list("thermoregulation")
+
+    async def change_season(self, season: str) -> dict:
+        """Change the season of the entire thermo implant.
+
+        :raises RequestError: if the season does not exist or the server refuses the request
+        """
+        # Check if the season exists
+        if season not in self.seasons.values():
+            raise RequestError
+
+        try:
+            return await self._appl_request(
+                {"client": self.id, "cmd_name": "thermo_season_req", "season": season},
+                priority=PRIORITY_COMMAND,
+            )
+        finally:
+            self.invalidate_list("thermoregulation")
+
+    def invalidate_list(self, category: str):
+        """Drop the cached list of the category, its items changed."""
+        if self._cache is not None:
+            self._cache.invalidate(self.available_commands[category])
+
+    async def _appl_request(
+        self, appl_msg: dict, timeout: int = REQUEST_TIMEOUT, priority=PRIORITY_REFRESH
+    ) -> dict:
+        """Send a domo application message to the server."""
+
+        def build_command():
+            """Build the command with the current session id and sequence."""
+            if "client" in appl_msg:
+                appl_msg["client"] = self.id
+            appl_msg["cseq"] = self._cseq
+            # Increment the cseq counter
+            self._cseq += 1
+
+            return {
+                "sl_appl_msg": appl_msg,
+                "sl_appl_msg_type": "domo",
+                "sl_client_id": self.id,
+                "sl_cmd": "sl_data_req",
+            }
+
+        return await self._data_request(build_command, timeout, priority, appl_msg["cmd_name"])
+
+    async def _data_request(
+        self,
+        build_command,
+        timeout: int = REQUEST_TIMEOUT,
+        priority=PRIORITY_REFRESH,
+        name: str = "sl_data_req",
+    ) -> dict:
+        """Send a data request and check the response of the server.
+
+        If the server refuses the request because the session expired, login
+        again and replay the request once with the new session id. Requests
+        refused for any other reason are not replayed.
+        :param name: name of the command in the metrics
+        """
+        client_id = self.id
+        response = await self._scheduled_post(build_command, timeout, priority)
+
+        if response["sl_data_ack_reason"] in SESSION_REASONS and self._credentials is not None:
+            _LOGGER.debug(
+                "Request refused with reason %s, renewing the session",
+                response["sl_data_ack_reason"],
+            )
+            if self._metrics is not None:
+                self._metrics.record_relogin(name)
+            if await self._async_relogin(client_id):
+                response = await self._scheduled_post(build_command, timeout, priority)
+
+        # Check if the response is valid
+        if response["sl_data_ack_reason"] != 0:
+            raise RequestError(f"Request refused, reason {response['sl_data_ack_reason']}")
+
+        self._last_activity = time.monotonic()
+
+        return response
+
+    async def _async_relogin(self, expired_id: str) -> bool:
+        """Login again unless another request already renewed the session."""
+        async with self._login_lock:
+            if self.id != expired_id:
+                return True
+            return await self.login(*self._credentials)
+
+    async def _scheduled_post(
+        self, build_command, timeout: int = REQUEST_TIMEOUT, priority=PRIORITY_REFRESH
+    ) -> dict:
+        """Post a command once the scheduler gives the request its turn.
+
+        The command is built when the request starts, so the sequence numbers
+        follow the order in which the requests reach the server.
+        :param priority: priority of the request, None to bypass the scheduler
+        """
+        if self._scheduler is None or priority is None:
+            return await self._post(build_command(), timeout)
+
+        async with self._scheduler.slot(priority):
+            return await self._post(build_command(), timeout)
+
+    async def _post(self, command: dict, timeout: int = REQUEST_TIMEOUT) -> dict:
+        """Post a command to the server and return the decoded response.
+
+        :raises CircuitOpen: if the circuit breaker does not let the request through
+        """
+        if command["sl_cmd"] == "sl_data_req":
+            name = command["sl_appl_msg"]["cmd_name"]
+        else:
+            name = command["sl_cmd"]
+        # A status update waits until something changes, its timeout tells nothing
+        tracked = self._breaker is not None and name != self.available_commands["update"]
+
+        if self._breaker is not None:
+            if tracked and not self._breaker.allow_request():
+                raise CircuitOpen(f"Server {self._url} not reachable, request not sent")
+            if not tracked and self._breaker.state != STATE_CLOSED:
+                raise CircuitOpen(f"Server {self._url} not reachable, request not sent")
+
+        params = {"command": json.dumps(command, separators=(",", ":"))}
+        started = time.perf_counter()
+
+        try:
+            async with self._session.post(
+                self._url, params=params, headers=self.header, timeout=timeout
+            ) as response:
+                # The server does not always declare the json content type
+                body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            self._record(name, started, error=True)
+            if tracked:
+                self._breaker.record_failure()
+            raise ServerNotFound from err
+        except asyncio.CancelledError:
+            if tracked:
+                self._breaker.release_probe()
+            raise
+
+        # The server answered, even if it refuses the request it is reachable
+        if self._breaker is not None:
+            self._breaker.record_success()
+
+        try:
+            result = json.loads(body, object_hook=self.object_hooks.get(name))
+        except ValueError:
+            self._record(name, started, len(body), error=True)
+            raise
+        self._record(name, started, len(body), result.get("sl_data_ack_reason") != 0)
+
+        return result
+
+    def _record(self, name: str, started: float, size: int = 0, error: bool = False):
+        """Record a request in the metrics."""
+        if self._metrics is not None:
+            self._metrics.record(name, time.perf_counter() - started, size, error)
@@ -0,0 +1,100 @@
+"""Circuit breaker protecting an unreachable eti/domo server."""
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# Consecutive connection failures opening the circuit
+FAILURE_THRESHOLD = 3
+# Delay before the first probe of an open circuit, doubled after every failed probe, in seconds
+MIN_PROBE_DELAY = 5
+MAX_PROBE_DELAY = 300
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stop sending requests to a server that does not answer.
+
+    After FAILURE_THRESHOLD consecutive connection failures the circuit
+    opens and every request fails at once, instead of waiting for its own
+    timeout. When the probe delay expires a single request is let through:
+    if it succeeds the circuit closes, otherwise the delay doubles.
+    """
+
+    def __init__(self, name: str):
+        """Init the closed breaker of the named server."""
+        self._name = name
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._probe_delay = MIN_PROBE_DELAY
+        # Monotonic time after which a probe is let through
+        self._retry_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self):
+        """Return the state of the circuit"""
+        if self._state == STATE_OPEN and time.monotonic() >= self._retry_at:
+            return STATE_HALF_OPEN
+        return self._state
+
+    @property
+    def retry_in(self):
+        """Return the seconds before the next probe, 0 if the circuit is closed"""
+        if self._state == STATE_CLOSED:
+            return 0.0
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def allow_request(self) -> bool:
+        """Return true if a request can be sent now, taking the probe slot if needed."""
+        if self._state == STATE_CLOSED:
+            return True
+        if self._probe_in_flight or time.monotonic() < self._retry_at:
+            return False
+
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self):
+        """Close the circuit after the server answered."""
+        if self._state != STATE_CLOSED:
+            _LOGGER.info("Server %s is reachable again", self._name)
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._probe_delay = MIN_PROBE_DELAY
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        """Count a connection failure, opening the circuit when needed."""
+        self._failures += 1
+
+        if self._state == STATE_CLOSED:
+            if self._failures < FAILURE_THRESHOLD:
+                return
+            _LOGGER.warning(
+                "Server %s not reachable, failing fast for %s seconds",
+                self._name,
+                self._probe_delay,
+            )
+        else:
+            if not self._probe_in_flight:
+                # A request sent before the circuit opened
+                return
+            # The probe failed, wait longer before the next one
+            self._probe_delay = min(self._probe_delay * 2, MAX_PROBE_DELAY)
+            _LOGGER.debug(
+                "Server %s still not reachable, next probe in %s seconds",
+                self._name,
+                self._probe_delay,
+            )
+
+        self._state = STATE_OPEN
+        self._retry_at = time.monotonic() + self._probe_delay
+        self._probe_in_flight = False
+
+    def release_probe(self):
+        """Give the probe slot back when the probe ended without telling anything."""
+        self._probe_in_flight = False
@@ -0,0 +1,91 @@
+"""Short lived cache of the list requests sent to an eti/domo server."""
+import asyncio
+import time
+
+
+class ListCache:
+    """Share the responses of the list requests among their callers.
+
+    The callers asking for a list while the same request is in flight wait
+    for that request instead of sending their own, then they all get the
+    same decoded response. A response is served again for ttl seconds,
+    unless a command touching its items invalidates it before. The cached
+    responses are shared, the callers must not modify them.
+    """
+
+    def __init__(self, ttl: float):
+        """Init the cache.
+
+        :param ttl: seconds a response is served again, 0 to only share the requests in flight
+        """
+        self._ttl = ttl
+        # Cached responses, cmd_name -> (monotonic expiry time, response)
+        self._responses = {}
+        # Requests in flight, cmd_name -> task
+        self._in_flight = {}
+        # Incremented on every invalidation, a request started before must not be cached
+        self._generations = {}
+        self.hits = 0
+        self.shared = 0
+        self.misses = 0
+
+    async def async_get(self, cmd_name: str, fetch) -> dict:
+        """Return the response of the list request, calling fetch only when needed.
+
+        :param fetch: coroutine function sending the request to the server
+        """
+        cached = self._responses.get(cmd_name)
+        if cached is not None:
+            if time.monotonic() < cached[0]:
+                self.hits += 1
+                return cached[1]
+            del self._responses[cmd_name]
+
+        task = self._in_flight.get(cmd_name)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(
+                self._async_fetch(cmd_name, fetch, self._generations.get(cmd_name, 0))
+            )
+            task.add_done_callback(_retrieve_exception)
+            self._in_flight[cmd_name] = task
+        else:
+            self.shared += 1
+
+        # A cancelled caller must not cancel the request of the others
+        return await asyncio.shield(task)
+
+    def invalidate(self, cmd_name: str):
+        """Drop the cached response of the list request, a command changed its items."""
+        self._generations[cmd_name] = self._generations.get(cmd_name, 0) + 1
+        self._responses.pop(cmd_name, None)
+        # The callers coming after the command send a new request
+        self._in_flight.pop(cmd_name, None)
+
+    def as_dict(self):
+        """Return the counters of the cache"""
+        return {
+            "ttl": self._ttl,
+            "hits": self.hits,
+            "shared": self.shared,
+            "misses": self.misses,
+        }
+
+    async def _async_fetch(self, cmd_name: str, fetch, generation: int) -> dict:
+        """Send the list request and cache its response if nothing invalidated it."""
+        try:
+            response = await fetch()
+        finally:
+            if self._in_flight.get(cmd_name) is asyncio.current_task():
+                del self._in_flight[cmd_name]
+
+        if self._ttl > 0 and self._generations.get(cmd_name, 0) == generation:
+            self._responses[cmd_name] = (time.monotonic() + self._ttl, response)
+
+        return response
+
+
+def _retrieve_exception(task: asyncio.Future):
+    """Mark the error of a request as seen, its callers may all have been cancelled."""
+    if not task.cancelled():
+        task.exception()
@@ -1,20 +1,12 @@
 """Platform for light integration."""
 import logging
-
-import voluptuous as vol
-
-import homeassistant.helpers.config_validation as cv
+from typing import List, Optional
 
 from homeassistant.components.climate.const import (
-    FAN_HIGH,
-    FAN_LOW,
-    FAN_MEDIUM,
     HVAC_MODE_AUTO,
     HVAC_MODE_COOL,
-    HVAC_MODE_FAN_ONLY,
     HVAC_MODE_HEAT,
     HVAC_MODE_OFF,
-    SUPPORT_FAN_MODE,
     SUPPORT_TARGET_TEMPERATURE,
     DEFAULT_MIN_TEMP,
     DEFAULT_MAX_TEMP
@@ -23,16 +15,14 @@ from homeassistant.const import (
     ATTR_TEMPERATURE,
     PRECISION_TENTHS,
     TEMP_CELSIUS,
-    TEMP_FAHRENHEIT,
 )
-
-from homeassistant.helpers.entity import Entity
 from homeassistant.components.climate import ClimateDevice
-from typing import Any, Dict, List, Optional
 
-from eti_domo import Domo, ServerNotFound
+from .api import DomoClient
 
 from .const import DOMAIN
+from .entity import CameEntity
+from .snapshot import ThermoRecord
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -40,69 +30,35 @@ _LOGGER = logging.getLogger(__name__)
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the Hue lights from a config entry."""
 
+    # Get the hub of the config entry
+    came_hub = hass.data[DOMAIN][config_entry.entry_id]
     # Get the Domo object
-    hub = hass.data[DOMAIN]["hub"]
-
-    # Retrieve all the thermo regulation from the eti/domo server
-    thermos = hub.list_request(Domo.available_commands['thermoregulation'])['array']
-
-    # Add all the devices as entities
-    async_add_entities(CameClimate(hub, climate) for climate in thermos)
-
-class CameClimate(ClimateDevice):
+    hub = came_hub.client
+    # Get the coordinator of the thermo zones
+    coordinator = came_hub.coordinators["thermoregulation"]
+
+    # Add all the thermo zones known by the coordinator as entities
+    came_hub.topology.async_add_platform(
+        "thermoregulation",
+        coordinator.data,
+        async_add_entities,
+        lambda climate, snapshot: CameClimate(
+            hub,
+            climate,
+            coordinator,
+            came_hub.thermo,
+            **came_hub.entity_kwargs("thermoregulation", climate, snapshot),
+        ),
+    )
+
+class CameClimate(CameEntity, ClimateDevice):
     """Representation of XBee Pro temperature sensor."""
 
-    def __init__(self, hub: Domo, climate):
+    def __init__(self, hub: DomoClient, climate: ThermoRecord, coordinator, thermo, unique_id: str, device_info: dict):
         """Init switch device."""
-        self.entity_id = "climate." + climate['name'].lower().replace(" ", "_") + "_" + str(climate['act_id'])
-        self._name = climate['name']
-        self._id = climate['act_id']
+        super().__init__(coordinator, climate, unique_id, device_info)
         self._hub = hub
-        self._status = climate['status']
-        self._temp = float(climate['temp']) / 10.0
-        self._mode = climate['mode']
-        self._set_point = float(climate['set_point']) / 10.0
-        self._season = climate['season']
-
-        # check if the thermo zone has a hygrometer
-        if 'hygro' in climate:
-            self._humidity = climate['hygro']
-        else:
-            self._humidity = None
-
-    @property
-    def unique_id(self):
-        """Return unique ID for this device."""
-        return self.entity_id
-
-    @property
-    def name(self):
-        """Return the name of the sensor."""
-        return self._name
-
-    def update(self):
-        """Get the latest data."""
-
-        # Send a keep alive request
-        self._hub.keep_alive()
-
-        # Retrieve all the sensors from the eti/domo server
-        thermos = self._hub.list_request(Domo.available_commands['thermoregulation'])['array']
-
-        # Search for the sensor
-        for climate in thermos:
-            if climate['act_id'] == self._id:
-                # update the value
-                self._status = climate['status']
-                self._temp = float(climate['temp']) / 10.0
-                self._mode = climate['mode']
-                self._set_point = float(climate['set_point']) / 10.0
-                self._season = climate['season']
-                # check if the thermo zone has a hygrometer
-                if 'hygro' in climate:
-                    self._humidity = climate['hygro']
-                else:
-                    self._humidity = None
+        self._thermo = thermo
 
     @property
     def precision(self) -> float:
@@ -117,7 +73,8 @@ class CameClimate(ClimateDevice):
     @property
     def current_humidity(self) -> Optional[int]:
         """Return the current humidity."""
-        return self._humidity
+        # None if the thermo zone has no hygrometer
+        return self._item.hygro
 
     @property
     def hvac_mode(self) -> str:
@@ -125,7 +82,10 @@ class CameClimate(ClimateDevice):
 
         Need to be one of HVAC_MODE_*.
         """
-        return Domo.thermo_status[self._mode]
+        mode = self._field("mode")
+        if mode is None:
+            return None
+        return DomoClient.thermo_status[mode]
 
     @property
     def hvac_modes(self) -> List[str]:
@@ -147,12 +107,12 @@ class CameClimate(ClimateDevice):
     @property
     def current_temperature(self) -> Optional[float]:
         """Return the current temperature."""
-        return self._temp
+        return self._item.temp
 
     @property
     def target_temperature(self) -> Optional[float]:
         """Return the temperature we try to reach."""
-        return self._set_point
+        return self._field("set_point")
 
     @property
     def target_temperature_step(self) -> Optional[float]:
@@ -175,67 +135,60 @@ class CameClimate(ClimateDevice):
         """
         raise 5.0
 
-    def set_temperature(self, **kwargs) -> None:
+    async def async_set_temperature(self, **kwargs) -> None:
         """Set new target temperature."""
-        if ATTR_TEMPERATURE in kwargs:
-            self._hub.thermo_mode(self._id, self._mode, kwargs[ATTR_TEMPERATURE])
+        if ATTR_TEMPERATURE not in kwargs:
+            return
 
-        # update infos about the climate device
-        self.update()
+        temperature = kwargs[ATTR_TEMPERATURE]
+        await self._async_send_optimistic(
+            self._thermo.async_configure(self._id, set_point=temperature),
+            set_point=temperature,
+        )
 
-    def set_hvac_mode(self, hvac_mode: str) -> None:
+    async def async_set_hvac_mode(self, hvac_mode: str) -> None:
         """Set new target hvac mode."""
-        
+        season = None
+
         # Check if there is a need to change season
         if hvac_mode == HVAC_MODE_COOL:
-            # change season if necessary
-            if not self._season == "summer":
-                self._hub.change_season(Domo.seasons["summer"])
-            # Turn on the heater
-            self.turn_on()
+            # Turn on the cooler in summer
+            season = "summer"
+            mode = 1
         elif hvac_mode == HVAC_MODE_HEAT:
-            # change season if necessary
-            if not self._season == "winter":
-                self._hub.change_season(Domo.seasons["winter"])
-            # Turn on the heater
-            self.turn_on()
+            # Turn on the heater in winter
+            season = "winter"
+            mode = 1
+        elif hvac_mode == HVAC_MODE_OFF:
+            mode = 0
         else:
             # default to auto
-            value = 2
-            # Check if it is to be set to auto or off
-            if hvac_mode == HVAC_MODE_AUTO:
-                value = 2
-            elif hvac_mode == HVAC_MODE_OFF:
-                value = 0
-            # change mode
-            self._hub.thermo_mode(self._id, value, self._set_point)
-
-        # update infos about the climate device
-        self.update()
-
-    def turn_on(self) -> None:
+            mode = 2
+
+        # the controller sends the season only if it differs from the current one
+        await self._async_send_optimistic(
+            self._thermo.async_configure(
+                self._id, DomoClient.seasons[season] if season else None, mode
+            ),
+            season=season or self._field("season"),
+            mode=mode,
+        )
+
+    async def async_turn_on(self) -> None:
         """Turn the entity on."""
-        
-        # Send a keep alive request
-        self._hub.keep_alive()
 
         # Turn on the climate
-        self._hub.thermo_mode(self._id, 1, self._set_point)
+        await self._async_send_optimistic(
+            self._thermo.async_configure(self._id, mode=1), mode=1
+        )
 
-        # update infos about the climate device
-        self.update()
-
-    def turn_off(self) -> None:
+    async def async_turn_off(self) -> None:
         """Turn the entity off."""
 
-        # Send a keep alive request
-        self._hub.keep_alive()
-
-        # Turn off the climate with default 20 degrees celsius
-        self._hub.thermo_mode(self._id, 0, self._set_point)
-
-        # update infos about the climate device
-        self.update()
+        # Turn off the climate keeping the current set point
+        await self._async_send_optimistic(
+            self._thermo.async_configure(self._id, mode=0), mode=0
+        )
 
     @property
     def supported_features(self) -> int:
@@ -0,0 +1,157 @@
+"""Queue coalescing the commands sent to the lights and relays."""
+import asyncio
+import logging
+
+from homeassistant.core import HomeAssistant
+
+from .api import DomoClient
+
+_LOGGER = logging.getLogger(__name__)
+
+# Time window in which the commands are collected in a single batch, in seconds
+COMMAND_WINDOW = 0.05
+
+
+class PendingCommand:
+    """Wanted status of an item, with the callers waiting for it."""
+
+    def __init__(self, status: bool, initial_status):
+        """Init the command."""
+        self.status = status
+        # Status of the item when the first command of the batch was queued
+        self.initial_status = initial_status
+        self.superseded = False
+        self.futures = []
+
+
+class CommandQueue:
+    """Collect the switch commands issued in a short window and send them in one batch.
+
+    Only the last command of the batch for an item is sent, the commands of
+    the batch are sent together and paced by the request scheduler, and the
+    categories touched by the batch are refreshed once at the end.
+    """
+
+    def __init__(self, hass: HomeAssistant, hub: DomoClient, coordinators: dict):
+        """Init the queue."""
+        self._hass = hass
+        self._hub = hub
+        self._coordinators = coordinators
+        # Pending commands, (category, act_id) -> PendingCommand
+        self._pending = {}
+        self._flush_handle = None
+
+    async def async_switch(self, act_id: int, status: bool, is_light: bool = True):
+        """Queue a command for a light or a relay and wait until it is sent.
+
+        :raises RequestError: if the server refuses the command
+        :raises ServerNotFound: if the server is not reachable
+        """
+        key = ("lights" if is_light else "relays", act_id)
+
+        command = self._pending.get(key)
+        if command is None:
+            command = PendingCommand(status, self._current_status(*key))
+            self._pending[key] = command
+        else:
+            # A later command for the same item replaces the previous one
+            command.status = status
+            command.superseded = True
+
+        future = self._hass.loop.create_future()
+        command.futures.append(future)
+
+        if self._flush_handle is None:
+            self._flush_handle = self._hass.loop.call_later(
+                COMMAND_WINDOW, lambda: self._hass.async_create_task(self._async_flush())
+            )
+
+        await future
+
+    async def async_switch_many(self, act_ids: list, status: bool, is_light: bool = True):
+        """Switch many lights or relays in a single batch.
+
+        The items already known to be in the wanted status are skipped.
+        :raises RequestError: if the server refuses one of the commands
+        :raises ServerNotFound: if the server is not reachable
+        """
+        category = "lights" if is_light else "relays"
+        act_ids = [
+            act_id for act_id in act_ids
+            if self._current_status(category, act_id) is not status
+        ]
+        if not act_ids:
+            return
+
+        results = await asyncio.gather(
+            *[self.async_switch(act_id, status, is_light) for act_id in act_ids],
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+    async def _async_flush(self):
+        """Send the batch of commands and refresh the touched categories."""
+        self._flush_handle = None
+        pending, self._pending = self._pending, {}
+
+        batch = []
+        for (category, act_id), command in pending.items():
+            # Commands cancelling each other (e.g. on then off) are dropped
+            if command.superseded and command.status == command.initial_status:
+                _LOGGER.debug("Dropping redundant commands for %s %s", category, act_id)
+                resolve_futures(command.futures)
+                continue
+            batch.append((category, act_id, command))
+
+        # Send the whole batch at once, the scheduler keeps the server within its budget
+        results = await asyncio.gather(
+            *[
+                self._hub.switch(act_id, status=command.status, is_light=category == "lights")
+                for category, act_id, command in batch
+            ],
+            return_exceptions=True,
+        )
+
+        touched = set()
+        for (category, act_id, command), result in zip(batch, results):
+            if isinstance(result, Exception):
+                resolve_futures(command.futures, result)
+                continue
+
+            touched.add(category)
+            resolve_futures(command.futures)
+
+        # A single refresh for the whole batch, then keep polling fast for a while
+        coordinators = [
+            self._coordinators[category]
+            for category in touched
+            if category in self._coordinators
+        ]
+        for coordinator in coordinators:
+            coordinator.async_boost()
+        await asyncio.gather(
+            *[coordinator.async_request_refresh() for coordinator in coordinators]
+        )
+
+    def _current_status(self, category: str, act_id: int):
+        """Return the last known status of an item, None if unknown."""
+        coordinator = self._coordinators.get(category)
+        if coordinator is None or coordinator.data is None:
+            return None
+        item = coordinator.data.get(act_id)
+        if item is None or item.status is None:
+            return None
+        return bool(item.status)
+
+
+def resolve_futures(futures: list, error: Exception = None):
+    """Wake up the callers waiting for a command."""
+    for future in futures:
+        if future.done():
+            continue
+        if error is None:
+            future.set_result(None)
+        else:
+            future.set_exception(error)
@@ -4,10 +4,29 @@ import logging
 import voluptuous as vol
 
 from homeassistant import config_entries, core, exceptions
-
-from .const import DOMAIN, CONF_HOST, CONF_USERNAME, CONF_PASSWORD  # pylint:disable=unused-import
-
-from eti_domo import Domo, ServerNotFound
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .api import DomoClient, RequestError, ServerNotFound
+from .const import (  # pylint:disable=unused-import
+    DOMAIN,
+    CONF_HOST,
+    CONF_USERNAME,
+    CONF_PASSWORD,
+    CONF_SCAN_INTERVAL,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_MAX_REQUEST_RATE,
+    CONF_LIST_CACHE_TTL,
+    CONF_ANALOG_DEADBAND,
+    CONF_ANALOG_WINDOW,
+    DEFAULT_SCAN_INTERVALS,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_MAX_REQUEST_RATE,
+    DEFAULT_LIST_CACHE_TTL,
+    DEFAULT_ANALOG_DEADBAND,
+    DEFAULT_ANALOG_WINDOW,
+    POLLED_CATEGORIES,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,34 +38,21 @@ async def validate_input(hass: core.HomeAssistant, data):
 
     Data has the keys from DATA_SCHEMA with values provided by the user.
     """
-    # TODO validate the data can be used to set up a connection.
-
-    # If your PyPI package is not built with async, pass your methods
-    # to the executor:
-    # await hass.async_add_executor_job(
-    #     your_validate_func, data["username"], data["password"]
-    # )
-
     # Create an object representing the eti/domo with the host ip
-    hub = None
+    hub = DomoClient(async_get_clientsession(hass), data["host"])
     try:
-        hub = Domo(data["host"])
-    except ServerNotFound:
-        raise CannotConnect
+        await hub.check_connection()
 
-    # login to the server
-    if not hub.login(data["username"], data['password']):
-        raise InvalidAuth
+        # login to the server
+        if not await hub.login(data["username"], data['password']):
+            raise InvalidAuth
 
-    # save the Domo object containing the client id session
-    hass.data[DOMAIN] = {}
-    hass.data[DOMAIN]["hub"] = hub
+        # search for the unique id of the server
+        server_info = await hub.list_request(DomoClient.available_commands['features'])
+    except (RequestError, ServerNotFound):
+        raise CannotConnect
 
-    # search for the unique id of the server
-    server_info = hub.list_request(Domo.available_commands['features'])
     serial = server_info['serial']
-        
-    #_LOGGER.error("Server host %s", hub.host, exc_info=1)
 
     # Return info that you want to store in the config entry.
     return {"title": serial}
@@ -56,14 +62,19 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Came Eti Domo."""
 
     VERSION = 1
-    # TODO pick one of the available connection classes in homeassistant/config_entries.py
-    #CONN_CLASS_UNKNOWN oppure CONN_CLASS_LOCAL_PUSH oppure CONN_CLASS_LOCAL_POLL
-    CONNECTION_CLASS = config_entries.CONN_CLASS_UNKNOWN
+    # The server pushes the status changes through the status update requests
+    CONNECTION_CLASS = config_entries.CONN_CLASS_LOCAL_PUSH
 
     def __init__(self):
         """Initialize the Config flow."""
         self.config = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(self, user_input=None):
         """Handle the initial step."""
         errors = {}
@@ -97,6 +108,68 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             step_id="user", data_schema=DATA_SCHEMA, errors=errors
         )
 
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the polling intervals of every category."""
+
+    def __init__(self, config_entry):
+        """Initialize the options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        schema = {
+            vol.Optional(
+                f"{CONF_SCAN_INTERVAL}_{category}",
+                default=options.get(
+                    f"{CONF_SCAN_INTERVAL}_{category}",
+                    DEFAULT_SCAN_INTERVALS[category],
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1))
+            for category in POLLED_CATEGORIES
+        }
+        # budget of the requests sent to the server
+        schema[
+            vol.Optional(
+                CONF_MAX_CONCURRENT_REQUESTS,
+                default=options.get(
+                    CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS
+                ),
+            )
+        ] = vol.All(vol.Coerce(int), vol.Range(min=1))
+        schema[
+            vol.Optional(
+                CONF_MAX_REQUEST_RATE,
+                default=options.get(CONF_MAX_REQUEST_RATE, DEFAULT_MAX_REQUEST_RATE),
+            )
+        ] = vol.All(vol.Coerce(float), vol.Range(min=0))
+        schema[
+            vol.Optional(
+                CONF_LIST_CACHE_TTL,
+                default=options.get(CONF_LIST_CACHE_TTL, DEFAULT_LIST_CACHE_TTL),
+            )
+        ] = vol.All(vol.Coerce(float), vol.Range(min=0))
+        # sampling of the analog inputs
+        schema[
+            vol.Optional(
+                CONF_ANALOG_DEADBAND,
+                default=options.get(CONF_ANALOG_DEADBAND, DEFAULT_ANALOG_DEADBAND),
+            )
+        ] = vol.All(vol.Coerce(float), vol.Range(min=0))
+        schema[
+            vol.Optional(
+                CONF_ANALOG_WINDOW,
+                default=options.get(CONF_ANALOG_WINDOW, DEFAULT_ANALOG_WINDOW),
+            )
+        ] = vol.All(vol.Coerce(int), vol.Range(min=0))
+        data_schema = vol.Schema(schema)
+
+        return self.async_show_form(step_id="init", data_schema=data_schema)
+
+
 class CannotConnect(exceptions.HomeAssistantError):
     """Error to indicate we cannot connect."""
 
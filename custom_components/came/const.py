@@ -4,3 +4,69 @@ DOMAIN = "came"
 CONF_HOST = "host"
 CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
+
+# Categories of items polled from the eti/domo server, one request each per poll cycle
+POLLED_CATEGORIES = ["lights", "relays", "analogin", "thermoregulation"]
+
+# Platform showing the items of every category
+CATEGORY_PLATFORMS = {
+    "lights": "light",
+    "relays": "switch",
+    "analogin": "sensor",
+    "thermoregulation": "climate",
+}
+
+# Option holding the polling interval of a category, suffixed by the category
+CONF_SCAN_INTERVAL = "scan_interval"
+
+# Default interval between two polls of every category, in seconds
+DEFAULT_SCAN_INTERVALS = {
+    "lights": 10,
+    "relays": 10,
+    "analogin": 60,
+    "thermoregulation": 60,
+}
+
+# Maximum factor by which the polling interval backs off when nothing changes
+MAX_BACKOFF_FACTOR = 16
+
+# Interval between two polls while the status updates are pushed, in seconds
+PUSH_SCAN_INTERVAL = 600
+
+# Options limiting the requests sent to the server
+CONF_MAX_CONCURRENT_REQUESTS = "max_concurrent_requests"
+CONF_MAX_REQUEST_RATE = "max_request_rate"
+CONF_LIST_CACHE_TTL = "list_cache_ttl"
+
+# Default number of requests in flight at the same time, the status updates excluded
+DEFAULT_MAX_CONCURRENT_REQUESTS = 2
+
+# Default number of requests started every second, 0 to rely on the concurrency alone
+DEFAULT_MAX_REQUEST_RATE = 0
+
+# Default seconds a list received from the server is served again, 0 to only share the requests in flight
+DEFAULT_LIST_CACHE_TTL = 1
+
+# Services switching the lights of a whole area
+SERVICE_TURN_ON_ROOM = "turn_on_room"
+SERVICE_TURN_OFF_ROOM = "turn_off_room"
+SERVICE_TURN_ON_FLOOR = "turn_on_floor"
+SERVICE_TURN_OFF_FLOOR = "turn_off_floor"
+SERVICE_ALL_OFF = "all_off"
+
+# Service logging the metrics of the requests and the state of every hub
+SERVICE_DUMP_DIAGNOSTICS = "dump_diagnostics"
+
+# Fields of the services, names of the floors and rooms as known by the server
+ATTR_FLOOR = "floor"
+ATTR_ROOM = "room"
+
+# Options of the sampling of the analog inputs
+CONF_ANALOG_DEADBAND = "analogin_deadband"
+CONF_ANALOG_WINDOW = "analogin_window"
+
+# Default minimum change of an analog input reported as a new state, in the unit of the input
+DEFAULT_ANALOG_DEADBAND = 0.5
+
+# Default seconds of samples aggregated in the state of an analog input
+DEFAULT_ANALOG_WINDOW = 300
@@ -0,0 +1,237 @@
+"""Coordinators polling the categories of items of the eti/domo server."""
+import asyncio
+from datetime import timedelta
+import logging
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+import homeassistant.util.dt as dt_util
+
+from .api import DomoClient, RequestError, ServerNotFound
+from .const import DOMAIN, MAX_BACKOFF_FACTOR, PUSH_SCAN_INTERVAL
+from .snapshot import DomoSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CameCoordinator(DataUpdateCoordinator):
+    """Poll a single category of items with an adaptive interval.
+
+    Every entity of the category listens to the same coordinator, so the
+    list is requested once per poll cycle regardless of the number of entities.
+    The interval doubles every time the server returns the same payload, up to
+    MAX_BACKOFF_FACTOR times the configured one, and goes back to the
+    configured one as soon as something changes or a command is sent.
+    """
+
+    def __init__(self, hass: HomeAssistant, hub: DomoClient, category: str, scan_interval: int):
+        """Init the coordinator of the category."""
+        self._hub = hub
+        self._category = category
+        self._min_interval = scan_interval
+        self._max_interval = scan_interval * MAX_BACKOFF_FACTOR
+        self._poll_interval = scan_interval
+        # True while the status changes are pushed by the server
+        self._push_active = False
+        # Items changed by the last update, None when every item must be refreshed
+        self._changed_ids = None
+        # Time of the last data received from the server, None if never received
+        self._last_success = None
+        # Time spent fetching and indexing the list by the last poll, in seconds
+        self._fetch_time = 0.0
+        self._index_time = 0.0
+
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN} {category}",
+            update_interval=timedelta(seconds=scan_interval),
+        )
+
+    @property
+    def category(self):
+        """Return the category polled by the coordinator"""
+        return self._category
+
+    @property
+    def last_success(self):
+        """Return the time of the last data received from the server, None if never received"""
+        return self._last_success
+
+    @property
+    def changed_ids(self):
+        """Return the act_id of the items changed by the last update, None if unknown"""
+        return self._changed_ids
+
+    async def async_refresh(self):
+        """Poll the category and log the time spent by every step of the cycle.
+
+        The debug line has a fixed key=value format, so the cycles can be
+        extracted from the log and profiled from end to end.
+        """
+        if not _LOGGER.isEnabledFor(logging.DEBUG):
+            await super().async_refresh()
+            return
+
+        started = time.perf_counter()
+        self._fetch_time = self._index_time = 0.0
+        await super().async_refresh()
+        total = time.perf_counter() - started
+
+        _LOGGER.debug(
+            "poll category=%s success=%s fetch_ms=%.1f index_ms=%.1f notify_ms=%.1f "
+            "total_ms=%.1f items=%s changed=%s interval=%s",
+            self._category,
+            self.last_update_success,
+            self._fetch_time * 1000,
+            self._index_time * 1000,
+            (total - self._fetch_time - self._index_time) * 1000,
+            total * 1000,
+            len(self.data) if self.data is not None else 0,
+            "all" if self._changed_ids is None else len(self._changed_ids),
+            self.update_interval.total_seconds(),
+        )
+
+    async def _async_update_data(self):
+        """Fetch the list of items of the category."""
+        started = time.perf_counter()
+        try:
+            response = await self._hub.list_request(
+                DomoClient.available_commands[self._category]
+            )
+        except (RequestError, ServerNotFound) as err:
+            self._changed_ids = set()
+            raise UpdateFailed(f"Error fetching {self._category}: {err}") from err
+        finally:
+            # The wait in the request scheduler is part of the fetch
+            self._fetch_time = time.perf_counter() - started
+
+        self._last_success = dt_util.utcnow()
+        started = time.perf_counter()
+        try:
+            return self._index(response["array"])
+        finally:
+            self._index_time = time.perf_counter() - started
+
+    def _index(self, payload: list):
+        """Index the fetched payload and adapt the polling interval."""
+        # Rebuild the index only when the payload actually changed
+        if self.data is not None and self.data.is_same_payload(payload):
+            self._changed_ids = set()
+            self._set_poll_interval(min(self._poll_interval * 2, self._max_interval))
+            return self.data
+
+        snapshot = DomoSnapshot(self._category, payload)
+        self._changed_ids = None if self.data is None else snapshot.changes_from(self.data)
+
+        # Nothing shown by the entities changed, keep backing off
+        if self._changed_ids is not None and not self._changed_ids:
+            self._set_poll_interval(min(self._poll_interval * 2, self._max_interval))
+        else:
+            self._set_poll_interval(self._min_interval)
+
+        return snapshot
+
+    @callback
+    def async_apply_updates(self, updates: list):
+        """Apply the status changes pushed by the server to the current snapshot."""
+        snapshot = self.data.with_updates(updates)
+        self._changed_ids = snapshot.changes_from(self.data)
+        self._last_success = dt_util.utcnow()
+        self._async_set_data(snapshot)
+
+    @callback
+    def async_set_cached(self, snapshot: DomoSnapshot):
+        """Use the cached topology until the server answers.
+
+        The entities can be created from it, but stay unavailable until the
+        live list is fetched.
+        """
+        self.data = snapshot
+        self.last_update_success = False
+
+    @callback
+    def async_set_bootstrap(self, snapshot: DomoSnapshot):
+        """Use the snapshot fetched during the setup as the first data."""
+        self._changed_ids = None
+        self._last_success = dt_util.utcnow()
+        self._async_set_data(snapshot)
+
+    @callback
+    def async_boost(self):
+        """Poll at the configured interval again, e.g. after a user command."""
+        if self._poll_interval == self._min_interval:
+            return
+
+        self._set_poll_interval(self._min_interval)
+        # Move the already scheduled poll closer
+        if self._unsub_refresh is not None:
+            self._schedule_refresh()
+
+    @callback
+    def async_set_push_active(self, active: bool):
+        """Poll only as a safety net while the server pushes the changes."""
+        if active == self._push_active:
+            return
+
+        self._push_active = active
+        self._set_poll_interval(self._min_interval)
+
+    @callback
+    def _async_set_data(self, snapshot: DomoSnapshot):
+        """Use data received outside of a poll and notify the entities.
+
+        The next poll is scheduled a whole interval after the data, as it
+        carries the latest state already.
+        """
+        if self._unsub_refresh is not None:
+            self._unsub_refresh()
+            self._unsub_refresh = None
+        self._debounced_refresh.async_cancel()
+
+        self.data = snapshot
+        self.last_update_success = True
+
+        if self._listeners:
+            self._schedule_refresh()
+        for update_callback in self._listeners:
+            update_callback()
+
+    def _set_poll_interval(self, seconds: int):
+        """Change the interval of the next polls."""
+        self._poll_interval = seconds
+        if self._push_active:
+            seconds = max(seconds, PUSH_SCAN_INTERVAL)
+        self.update_interval = timedelta(seconds=seconds)
+
+
+async def async_bootstrap(hub: DomoClient, categories: list) -> dict:
+    """Fetch the features and the lists of the categories in one parallel round.
+
+    :return: the snapshot of every category supported by the server
+    :raises RequestError: if the server refuses the request of the features
+    :raises ServerNotFound: if the server is not reachable
+    """
+    features, *lists = await asyncio.gather(
+        hub.list_request(DomoClient.available_commands["features"]),
+        *[
+            hub.list_request(DomoClient.available_commands[category])
+            for category in categories
+        ],
+        return_exceptions=True,
+    )
+
+    if isinstance(features, Exception):
+        raise features
+
+    snapshots = {}
+    for category, response in zip(categories, lists):
+        # The categories not enabled on the server are skipped
+        if category not in features.get("list", []):
+            continue
+        if isinstance(response, Exception):
+            raise response
+        snapshots[category] = DomoSnapshot(category, response["array"])
+
+    return snapshots
@@ -0,0 +1,134 @@
+"""Devices of the installation, built from the topology."""
+import logging
+import re
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import async_get_registry as async_get_device_registry
+from homeassistant.helpers.entity_registry import async_get_registry as async_get_entity_registry
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+MANUFACTURER = "Came"
+SERVER_MODEL = "ETI/Domo"
+ROOM_MODEL = "Lights of the room"
+ZONE_MODEL = "Thermo zone"
+
+# Unique id given by the previous versions, the entity_id ending with the act_id
+LEGACY_UNIQUE_ID = re.compile(
+    r"^(?P<platform>light|switch|sensor|climate)\.(?:.*_)?(?P<act_id>\d+)$"
+)
+
+
+def entity_unique_id(serial: str, platform: str, act_id) -> str:
+    """Return the unique id of the entity of an item, stable across renames."""
+    return f"{serial}_{platform}_{act_id}"
+
+
+class CameDevices:
+    """Devices of a server: the server itself, the rooms with lights and the thermo zones.
+
+    The devices are built in a single pass over the snapshots and registered
+    together, then every entity links to its device by reference to a shared
+    device info, so nothing is rebuilt per entity.
+    """
+
+    def __init__(self, serial: str, title: str):
+        """Init the devices of the server with the given serial."""
+        self._serial = serial
+        self._server_info = {"identifiers": {(DOMAIN, serial)}}
+        # Device info of every room, (floor_ind, room_ind) -> device info
+        self._rooms = {}
+        # Device info of every thermo zone, act_id -> device info
+        self._zones = {}
+        # Arguments registering the devices not registered yet
+        self._definitions = {}
+        self._define(self._server_info, title, SERVER_MODEL)
+
+    def build(self, snapshots: dict):
+        """Add the devices of the rooms and of the thermo zones of the snapshots."""
+        lights = snapshots.get("lights")
+        if lights is not None:
+            for floor_ind, room_ind in lights.rooms:
+                if (floor_ind, room_ind) in self._rooms:
+                    continue
+                info = {"identifiers": {(DOMAIN, f"{self._serial}_room_{floor_ind}_{room_ind}")}}
+                self._rooms[(floor_ind, room_ind)] = info
+                self._define(
+                    info,
+                    f"{lights.floor_name(floor_ind)} {lights.room_name(floor_ind, room_ind)}",
+                    ROOM_MODEL,
+                )
+
+        zones = snapshots.get("thermoregulation")
+        if zones is not None:
+            for zone in zones:
+                if zone.act_id in self._zones:
+                    continue
+                info = {"identifiers": {(DOMAIN, f"{self._serial}_zone_{zone.act_id}")}}
+                self._zones[zone.act_id] = info
+                self._define(info, zone.name, ZONE_MODEL)
+
+    def device_info(self, category: str, item, snapshot) -> dict:
+        """Return the device info of the entity of an item."""
+        if category == "lights":
+            return self._rooms.get(snapshot.location(item.act_id), self._server_info)
+        if category == "thermoregulation":
+            return self._zones.get(item.act_id, self._server_info)
+        return self._server_info
+
+    @property
+    def server_info(self):
+        """Return the device info of the server"""
+        return self._server_info
+
+    async def async_register(self, hass: HomeAssistant, entry: ConfigEntry):
+        """Register the devices not registered yet, in a single pass."""
+        if not self._definitions:
+            return
+
+        registry = await async_get_device_registry(hass)
+        for definition in self._definitions.values():
+            registry.async_get_or_create(config_entry_id=entry.entry_id, **definition)
+        self._definitions = {}
+
+    def _define(self, info: dict, name: str, model: str):
+        """Queue the registration of a device."""
+        (identifier,) = info["identifiers"]
+        definition = {
+            "identifiers": info["identifiers"],
+            "name": name,
+            "manufacturer": MANUFACTURER,
+            "model": model,
+        }
+        if info is not self._server_info:
+            definition["via_device"] = (DOMAIN, self._serial)
+        self._definitions[identifier] = definition
+
+
+async def async_migrate_unique_ids(hass: HomeAssistant, entry: ConfigEntry, serial: str):
+    """Move the entities registered with the legacy unique ids to the stable ones.
+
+    The entity_id of the migrated entities does not change.
+    """
+    registry = await async_get_entity_registry(hass)
+
+    migrated = 0
+    for entity in list(registry.entities.values()):
+        if entity.config_entry_id != entry.entry_id or entity.platform != DOMAIN:
+            continue
+        match = LEGACY_UNIQUE_ID.match(entity.unique_id)
+        if match is None:
+            continue
+
+        unique_id = entity_unique_id(serial, match["platform"], match["act_id"])
+        if registry.async_get_entity_id(match["platform"], DOMAIN, unique_id) is not None:
+            _LOGGER.warning("Not migrating %s, %s already exists", entity.entity_id, unique_id)
+            continue
+        registry.async_update_entity(entity.entity_id, new_unique_id=unique_id)
+        migrated += 1
+
+    if migrated:
+        _LOGGER.info("Migrated the unique id of %s entities", migrated)
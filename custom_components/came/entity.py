@@ -0,0 +1,199 @@
+"""Base entity for the Came Eti Domo integration."""
+from datetime import timedelta
+import logging
+
+from homeassistant.core import callback
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+import homeassistant.util.dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+# Time the last known state is still shown after the server stopped answering
+STALE_STATE_TIMEOUT = timedelta(minutes=15)
+
+# Attributes of the entities showing a stale state
+ATTR_STALE = "stale"
+ATTR_LAST_UPDATE = "last_update"
+
+
+class CameEntity(Entity):
+    """Entity whose state is fed by the coordinator of its category."""
+
+    # True to see every successful update of the coordinator, even when the
+    # item did not change, e.g. to sample its value over time
+    sample_every_update = False
+
+    def __init__(
+        self, coordinator: DataUpdateCoordinator, item, unique_id: str, device_info: dict
+    ):
+        """Init the entity."""
+        self._coordinator = coordinator
+        self._id = item.act_id
+        # Record of the item in the data of the coordinator, read by the properties
+        self._item = item
+        # State shown until an update confirms or rolls back a command, field -> value
+        self._optimistic = {}
+        self._unique_id = unique_id
+        # Shared by all the entities of the same device
+        self._device_info = device_info
+        # Number of commands sent whose optimistic state is not confirmed yet
+        self._commands_in_flight = 0
+        # True after a command, until an update confirms or rolls back its state
+        self._unconfirmed = False
+        # Availability and staleness of the entity when its state was last written
+        self._was_available = True
+        self._was_stale = False
+
+    @property
+    def name(self):
+        """Return the name of the item on the server."""
+        return self._item.name
+
+    @property
+    def unique_id(self):
+        """Return the unique id, built from the serial of the server and the act_id."""
+        return self._unique_id
+
+    @property
+    def device_info(self):
+        """Return the device of the server, room or thermo zone of the entity."""
+        return self._device_info
+
+    @property
+    def should_poll(self):
+        """The coordinator takes care of polling."""
+        return False
+
+    @property
+    def available(self):
+        """Return true if the state is fresh, or stale but recent enough to be shown."""
+        if self._coordinator.last_update_success:
+            return True
+        last_success = self._coordinator.last_success
+        return last_success is not None and dt_util.utcnow() - last_success < STALE_STATE_TIMEOUT
+
+    @property
+    def stale(self):
+        """Return true if the last poll of the category failed"""
+        return not self._coordinator.last_update_success
+
+    @property
+    def device_state_attributes(self):
+        """Return the time of the last known state when it is stale."""
+        if not self.stale or self._coordinator.last_success is None:
+            return None
+        return {
+            ATTR_STALE: True,
+            ATTR_LAST_UPDATE: self._coordinator.last_success.isoformat(),
+        }
+
+    @property
+    def coordinator(self):
+        """Return the coordinator of the category"""
+        return self._coordinator
+
+    async def async_added_to_hass(self):
+        """Subscribe to the coordinator updates."""
+        self.async_on_remove(
+            self._coordinator.async_add_listener(self._handle_coordinator_update)
+        )
+
+    async def async_update(self):
+        """Ask the coordinator for a refresh, used by homeassistant.update_entity."""
+        await self._coordinator.async_request_refresh()
+
+    def _handle_coordinator_update(self):
+        """Refresh the entity from the new data of the coordinator."""
+        # Data fetched while a command is being sent would roll back the
+        # optimistic state, wait for the data received after the command
+        if self._commands_in_flight:
+            return
+
+        # Write the state only if the item, the availability or the staleness changed
+        available = self.available
+        stale = self.stale
+        changed_ids = self._coordinator.changed_ids
+        sample = self.sample_every_update and not stale
+        if (
+            not sample
+            and not self._unconfirmed
+            and available == self._was_available
+            and stale == self._was_stale
+            and changed_ids is not None
+            and self._id not in changed_ids
+        ):
+            return
+
+        changed = None
+        if self._coordinator.data is not None:
+            changed = self._update_from_data(self._coordinator.data)
+        # The entity filtered out the change of its item
+        if (
+            changed is False
+            and not self._unconfirmed
+            and available == self._was_available
+            and stale == self._was_stale
+        ):
+            return
+
+        self._unconfirmed = False
+        self._optimistic.clear()
+        self._was_available = available
+        self._was_stale = stale
+        self.async_write_ha_state()
+
+    async def _async_send_optimistic(self, command, **state):
+        """Show the expected state at once, then send the command.
+
+        The keyword arguments are the fields of the record to show before the
+        command is sent. The next update of the coordinator confirms them, or
+        rolls them back if the device disagrees.
+        """
+        self._optimistic.update(state)
+        self._commands_in_flight += 1
+        self.async_write_ha_state()
+
+        try:
+            try:
+                await command
+            finally:
+                # Whatever the outcome, cancellation included, let the updates through again
+                self._commands_in_flight -= 1
+                self._unconfirmed = True
+        except Exception:
+            # The command failed, go back to the last known state
+            self._handle_coordinator_update()
+            raise
+
+    def _field(self, field: str):
+        """Return a field of the record, or its optimistic value after a command."""
+        if field in self._optimistic:
+            return self._optimistic[field]
+        return getattr(self._item, field)
+
+    @callback
+    def async_rename(self, name: str):
+        """Show the new name given to the item on the server."""
+        self._item = self._item.updated({"name": name})
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    def _update_from_data(self, snapshot):
+        """Update the internal state from the snapshot of the category.
+
+        :return: False if the state to write did not change, None if unknown
+        """
+        item = snapshot.get(self._id)
+        if item is not None:
+            return self._update_from_item(item)
+        return None
+
+    def _update_from_item(self, item):
+        """Keep the new record of the entity.
+
+        :return: False if the state to write did not change
+        """
+        previous = self._item
+        self._item = item
+        return item is not previous and item.differs_from(previous)
@@ -0,0 +1,372 @@
+"""Connection to a single eti/domo server, one for every config entry."""
+import asyncio
+from datetime import timedelta
+import logging
+
+import aiohttp
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.event import async_track_time_interval
+
+from .api import DomoClient, RequestError, ServerNotFound
+from .breaker import CircuitBreaker
+from .cache import ListCache
+from .commands import CommandQueue
+from .const import (
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    CATEGORY_PLATFORMS,
+    CONF_SCAN_INTERVAL,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_MAX_REQUEST_RATE,
+    CONF_LIST_CACHE_TTL,
+    DEFAULT_SCAN_INTERVALS,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_MAX_REQUEST_RATE,
+    DEFAULT_LIST_CACHE_TTL,
+    POLLED_CATEGORIES,
+)
+from .coordinator import CameCoordinator, async_bootstrap
+from .devices import CameDevices, async_migrate_unique_ids, entity_unique_id
+from .listener import DomoStatusListener
+from .metrics import RequestMetrics
+from .scheduler import PRIORITY_COMMAND, PRIORITY_REFRESH, RequestScheduler
+from .thermo import ThermoController
+from .topology import CameTopology
+
+_LOGGER = logging.getLogger(__name__)
+
+# Interval between two checks of the age of the session
+KEEP_ALIVE_CHECK_INTERVAL = timedelta(seconds=30)
+
+# Maximum delay between two connection attempts in the background, in seconds
+MAX_CONNECT_DELAY = 300
+
+# Interval between two comparisons of the fetched lists with the entities
+TOPOLOGY_CHECK_INTERVAL = timedelta(minutes=5)
+
+# Configuration fields never shown in the diagnostics
+REDACTED_FIELDS = (CONF_USERNAME, CONF_PASSWORD)
+
+
+class CameHub:
+    """Everything needed to talk to one eti/domo server.
+
+    Every config entry gets its own hub, with its own pool of http
+    connections, request scheduler, coordinators, command queue and status
+    listener, so several servers are polled concurrently and a slow one does
+    not stall the others. The metrics of the requests and the circuit breaker
+    are kept per hub too, so a dead server only fails its own requests fast.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+        """Init the hub of the config entry."""
+        self._hass = hass
+        self._entry = entry
+        # the serial of the server identifies its devices and entities
+        self.serial = entry.unique_id or entry.entry_id
+        self._session = None
+        self._connect_task = None
+        self._unsub_keep_alive = None
+        self._unsub_topology_check = None
+        self._unsub_stop = None
+        # Callbacks removing the listeners registered for the hub, called on unload
+        self._on_unload = []
+
+        self.client = None
+        self.scheduler = None
+        self.metrics = RequestMetrics()
+        self.breaker = CircuitBreaker(entry.data[CONF_HOST])
+        # share the lists among the coordinators asking for them at the same time
+        self.cache = ListCache(entry.options.get(CONF_LIST_CACHE_TTL, DEFAULT_LIST_CACHE_TTL))
+        self.coordinators = {}
+        self.topology = None
+        self.listener = None
+        self.queue = None
+        self.thermo = None
+        self.devices = CameDevices(self.serial, entry.title)
+
+    @property
+    def platforms(self):
+        """Return the platforms of the categories supported by the server"""
+        platforms = [CATEGORY_PLATFORMS[category] for category in self.coordinators]
+        # the diagnostic sensors are always added
+        if "sensor" not in platforms:
+            platforms.append("sensor")
+        return platforms
+
+    async def async_setup(self):
+        """Connect to the server, or to the cached topology if it does not answer.
+
+        :raises ConfigEntryNotReady: if the server does not answer and nothing is cached
+        """
+        hass = self._hass
+        entry = self._entry
+
+        # limit the requests sent to the server, the commands before the refreshes
+        max_concurrent = entry.options.get(
+            CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS
+        )
+        self.scheduler = RequestScheduler(
+            max_concurrent,
+            entry.options.get(CONF_MAX_REQUEST_RATE, DEFAULT_MAX_REQUEST_RATE),
+        )
+
+        # create a pool of connections dedicated to this server, one more for the status updates
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=max_concurrent + 1)
+        )
+        self.client = DomoClient(
+            self._session,
+            entry.data[CONF_HOST],
+            self.scheduler,
+            self.metrics,
+            self.breaker,
+            self.cache,
+        )
+        # close the connections even if home assistant stops without unloading the entry
+        self._unsub_stop = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, self._async_handle_stop
+        )
+
+        try:
+            await self._async_start()
+        except BaseException:
+            # a failed setup leaves nothing running, whatever the error
+            await self.async_unload()
+            raise
+
+    async def _async_start(self):
+        """Load the topology, register the devices and start the coordinators."""
+        hass = self._hass
+        entry = self._entry
+
+        # load the topology saved by the previous run
+        self.topology = CameTopology(hass, self.serial)
+        snapshots = await self.topology.async_load()
+        cached = snapshots is not None
+
+        if not cached:
+            # nothing is cached, the server must answer before the entities are created
+            try:
+                snapshots = await self._async_connect()
+            except (RequestError, ServerNotFound) as err:
+                raise ConfigEntryNotReady from err
+            await self.topology.async_save(snapshots)
+
+        # register the devices and areas of the installation in a single pass
+        await async_migrate_unique_ids(hass, entry, self.serial)
+        self.devices.build(snapshots)
+        await self.devices.async_register(hass, entry)
+
+        # create one coordinator per category, shared by all the entities of that category
+        self.coordinators = {
+            category: CameCoordinator(
+                hass,
+                self.client,
+                category,
+                entry.options.get(
+                    f"{CONF_SCAN_INTERVAL}_{category}", DEFAULT_SCAN_INTERVALS[category]
+                ),
+            )
+            for category in snapshots
+        }
+
+        self.listener = DomoStatusListener(hass, self.client, self.coordinators)
+        self.queue = CommandQueue(hass, self.client, self.coordinators)
+        self.thermo = ThermoController(hass, self.client, self.coordinators)
+
+        if cached:
+            # create the entities from the cache, the live lists are fetched in the background
+            for category, coordinator in self.coordinators.items():
+                coordinator.async_set_cached(snapshots[category])
+            # not tracked by home assistant, its startup must not wait for an offline server
+            self._connect_task = hass.loop.create_task(self._async_connect_in_background())
+        else:
+            for category, coordinator in self.coordinators.items():
+                coordinator.async_set_bootstrap(snapshots[category])
+            # listen to the status changes pushed by the server
+            self.listener.start()
+
+        self._unsub_keep_alive = async_track_time_interval(
+            hass, self._async_keep_alive, KEEP_ALIVE_CHECK_INTERVAL
+        )
+        # follow the items added, removed and renamed on the server
+        self._unsub_topology_check = async_track_time_interval(
+            hass, self._async_check_topology, TOPOLOGY_CHECK_INTERVAL
+        )
+
+    def entity_kwargs(self, category: str, item, snapshot) -> dict:
+        """Return the unique id and the device info of the entity of an item."""
+        return {
+            "unique_id": entity_unique_id(self.serial, CATEGORY_PLATFORMS[category], item.act_id),
+            "device_info": self.devices.device_info(category, item, snapshot),
+        }
+
+    @property
+    def scheduler_state(self):
+        """Return the state of the request scheduler, wait times in seconds"""
+        return {
+            "queue_depth": self.scheduler.queue_depth,
+            "in_flight": self.scheduler.in_flight,
+            "command_wait_avg": round(self.scheduler.average_wait(PRIORITY_COMMAND), 4),
+            "command_wait_max": round(self.scheduler.max_wait(PRIORITY_COMMAND), 4),
+            "refresh_wait_avg": round(self.scheduler.average_wait(PRIORITY_REFRESH), 4),
+            "refresh_wait_max": round(self.scheduler.max_wait(PRIORITY_REFRESH), 4),
+        }
+
+    @property
+    def diagnostics(self):
+        """Return the metrics of the requests and the state of the hub"""
+        return {
+            "entry": {
+                "title": self._entry.title,
+                "data": {
+                    key: "**REDACTED**" if key in REDACTED_FIELDS else value
+                    for key, value in self._entry.data.items()
+                },
+                "options": dict(self._entry.options),
+            },
+            "session_idle_time": round(self.client.idle_time, 1),
+            "circuit": {
+                "state": self.breaker.state,
+                "retry_in": round(self.breaker.retry_in, 1),
+            },
+            "scheduler": self.scheduler_state,
+            "requests": self.metrics.as_dict(),
+            "list_cache": self.cache.as_dict(),
+            "coordinators": {
+                category: {
+                    "last_update_success": coordinator.last_update_success,
+                    "update_interval": coordinator.update_interval.total_seconds(),
+                    "items": len(coordinator.data) if coordinator.data is not None else 0,
+                }
+                for category, coordinator in self.coordinators.items()
+            },
+        }
+
+    def async_on_unload(self, func):
+        """Call the function when the hub is unloaded, e.g. to remove a listener."""
+        self._on_unload.append(func)
+
+    async def async_unload(self):
+        """Stop every background task and close the connections.
+
+        Safe to call more than once, and after a setup that failed halfway.
+        """
+        while self._on_unload:
+            self._on_unload.pop()()
+        if self._unsub_stop is not None:
+            self._unsub_stop()
+            self._unsub_stop = None
+        self._cancel_connect()
+        if self.listener is not None:
+            await self.listener.async_stop()
+        if self._unsub_keep_alive is not None:
+            self._unsub_keep_alive()
+            self._unsub_keep_alive = None
+        if self._unsub_topology_check is not None:
+            self._unsub_topology_check()
+            self._unsub_topology_check = None
+        if self._session is not None:
+            await self._session.close()
+
+    async def _async_handle_stop(self, event):
+        """Stop everything when home assistant stops, the entry is not unloaded."""
+        # the listener fired, removing it again would log a warning
+        self._unsub_stop = None
+        await self.async_unload()
+
+    def _cancel_connect(self):
+        """Cancel the connection in the background, if still running."""
+        if self._connect_task is not None:
+            self._connect_task.cancel()
+            self._connect_task = None
+
+    async def _async_keep_alive(self, now):
+        """Save the session of the client if it is close to expiring."""
+        try:
+            await self.client.async_keep_alive_if_needed()
+        except (RequestError, ServerNotFound) as err:
+            _LOGGER.debug("Unable to keep the session alive: %s", err)
+
+    async def _async_check_topology(self, now):
+        """Reconcile the entities with the lists already fetched by the coordinators.
+
+        No request is sent to the server, the check waits for the connection
+        in the background and skips the categories whose last poll failed.
+        """
+        if self._connect_task is not None:
+            return
+
+        await self._async_reconcile(
+            {
+                category: coordinator.data
+                for category, coordinator in self.coordinators.items()
+                if coordinator.last_update_success and coordinator.data is not None
+            }
+        )
+
+    async def _async_reconcile(self, snapshots: dict):
+        """Update the devices, the entities and the cached topology from the snapshots."""
+        # the new rooms and zones get their devices before their entities
+        self.devices.build(snapshots)
+        await self.devices.async_register(self._hass, self._entry)
+
+        for category, snapshot in snapshots.items():
+            await self.topology.async_reconcile(category, snapshot)
+
+        # categories enabled on the server after the setup are added by a reload
+        for category in snapshots:
+            if category not in self.coordinators:
+                _LOGGER.info("New category %s found, it will be added after a restart", category)
+
+        # keep the cache of the categories not part of the snapshots
+        saved = {
+            category: coordinator.data
+            for category, coordinator in self.coordinators.items()
+            if coordinator.data is not None
+        }
+        saved.update(snapshots)
+        await self.topology.async_save(saved)
+
+    async def _async_connect(self) -> dict:
+        """Login and fetch the snapshot of every category supported by the server."""
+        # login to the server
+        if not await self.client.login(
+            self._entry.data[CONF_USERNAME], self._entry.data[CONF_PASSWORD]
+        ):
+            raise RequestError("Invalid authentication")
+        # fetch the initial data of every category in a single parallel round
+        return await async_bootstrap(self.client, POLLED_CATEGORIES)
+
+    async def _async_connect_in_background(self):
+        """Connect to the server until it answers, then reconcile the cached topology."""
+        delay = 5
+        while True:
+            try:
+                snapshots = await self._async_connect()
+                break
+            except (RequestError, ServerNotFound) as err:
+                _LOGGER.warning(
+                    "Server %s not available, retry in %s seconds: %s",
+                    self.client.host,
+                    delay,
+                    err,
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_CONNECT_DELAY)
+
+        for category, coordinator in self.coordinators.items():
+            if category in snapshots:
+                coordinator.async_set_bootstrap(snapshots[category])
+
+        await self._async_reconcile(snapshots)
+
+        # listen to the status changes pushed by the server
+        self.listener.start()
+        self._connect_task = None
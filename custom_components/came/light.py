@@ -1,17 +1,14 @@
 """Platform for light integration."""
 import logging
 
-import voluptuous as vol
-
-import homeassistant.helpers.config_validation as cv
 # Import the device class from the component that you want to support
 from homeassistant.components.light import Light
 
-from homeassistant.helpers.entity import Entity
-
-from eti_domo import Domo, ServerNotFound
+from .api import DomoClient
 
 from .const import DOMAIN
+from .entity import CameEntity
+from .snapshot import LightRecord
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,46 +20,34 @@ def setup_platform(hass, config, add_entities, discovery_info=None):
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the Hue lights from a config entry."""
 
+    # Get the hub of the config entry
+    came_hub = hass.data[DOMAIN][config_entry.entry_id]
     # Get the Domo object
-    hub = hass.data[DOMAIN]["hub"]
-
-    # Retrieve all the lights from the eti/domo server
-    floors = hub.list_request(Domo.available_commands['lights'])['array']
-
-    # Create a list of lights
-    lights = []
-    
-    # Fetch the lights inside the floors and rooms
-    for floor in floors:
-        for room in floor['array']:
-            for item in room['array']:
-                lights.append([item, floor['name'], room['name']])
-
-    # Add all the lights as entities
-    async_add_entities(CameLight(light[0], light[1], light[2],  hub) for light in lights)
-
-class CameLight(Light):
+    hub = came_hub.client
+    # Get the coordinator of the lights
+    coordinator = came_hub.coordinators["lights"]
+    # Get the queue of the commands
+    queue = came_hub.queue
+
+    def create_light(light, snapshot):
+        """Create the entity of a light, part of the device of its room."""
+        return CameLight(
+            light, hub, coordinator, queue, **came_hub.entity_kwargs("lights", light, snapshot)
+        )
+
+    # Add all the lights known by the coordinator as entities
+    came_hub.topology.async_add_platform(
+        "lights", coordinator.data, async_add_entities, create_light
+    )
+
+class CameLight(CameEntity, Light):
     """Representation of an Awesome Light."""
 
-    def __init__(self, light: dict, floor_name: str, room_name: str, hub: Domo):
+    def __init__(self, light: LightRecord, hub: DomoClient, coordinator, queue, unique_id: str, device_info: dict):
         """Initialize an AwesomeLight."""
-        self.entity_id = "light." + floor_name.lower().replace(" ", "_") + "_" + light['name'].lower().replace(" ", "_").replace(".", "") + "_" + str(light['act_id'])
-        self._id = light['act_id']
-        self._name = light['name']
-        self._state = light['status']
-        self._floor_ind = light['floor_ind']
-        self._room_ind = light['room_ind']
+        super().__init__(coordinator, light, unique_id, device_info)
         self._hub = hub
-
-    @property
-    def unique_id(self):
-        """Return unique ID for this device."""
-        return self.entity_id
-
-    @property
-    def name(self):
-        """Return the display name of this light."""
-        return self._name
+        self._queue = queue
 
     @property
     def hub(self):
@@ -77,63 +62,33 @@ class CameLight(Light):
     @property
     def is_on(self):
         """Return true if light is on."""
-        return self._state
+        return self._field("status")
 
     @property
     def floor_ind(self):
         """Return the index of the floor that contains the light"""
-        return self._floor_ind
+        return self._item.floor_ind
 
     @property
     def room_ind(self):
         """Return the index of the room that contains the light"""
-        return self._room_ind
+        return self._item.room_ind
 
-    def turn_on(self):
+    async def async_turn_on(self, **kwargs):
         """Instruct the light to turn on.
         You can skip the brightness part if your light does not support
         brightness control.
         """
 
-        # Send a keep alive request
-        self._hub.keep_alive()
-
         # Turn on the light
-        self._hub.switch(self._id, status=True, is_light=True)
-
-        # Update the status
-        self.update()
+        await self._async_send_optimistic(
+            self._queue.async_switch(self._id, True, is_light=True), status=True
+        )
 
-    def turn_off(self):
+    async def async_turn_off(self, **kwargs):
         """Instruct the light to turn off."""
 
-        # Send a keep alive request
-        self._hub.keep_alive()
         # Turn off the light
-        self._hub.switch(self._id, status=False, is_light=True)
-
-        # Update the status
-        self.update()
-
-    def update(self):
-        """Fetch new state data for this light.
-        This is the only method that should fetch new data for Home Assistant.
-        """
-
-        # Send a keep alive request
-        self._hub.keep_alive()
-
-        # Update the light info
-        floors = self._hub.list_request(Domo.available_commands['lights'])['array']
-
-        # Search for the light
-        for floor in floors:
-            if floor['floor_ind'] == self._floor_ind:
-                for room in floor['array']:
-                    if room['room_ind'] == self._room_ind:
-                        for light in room['array']:
-                            if light['act_id'] == self._id:
-                                # Light found, updating the status
-                                self._state = light['status']
-
-        
\ No newline at end of file
+        await self._async_send_optimistic(
+            self._queue.async_switch(self._id, False, is_light=True), status=False
+        )
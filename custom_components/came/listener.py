@@ -0,0 +1,115 @@
+"""Listener of the status updates pushed by the eti/domo server."""
+import asyncio
+import logging
+import time
+
+from homeassistant.core import HomeAssistant
+
+from .api import DomoClient, RequestError, ServerNotFound
+
+_LOGGER = logging.getLogger(__name__)
+
+# Prefix of the cmd_name of the updates of every category
+UPDATE_PREFIXES = {
+    "light": "lights",
+    "relay": "relays",
+    "analogin": "analogin",
+    "thermo": "thermoregulation",
+}
+
+# Minimum time between two status update requests, in seconds
+MIN_UPDATE_INTERVAL = 1
+# Maximum delay before retrying after an error, in seconds
+MAX_RETRY_DELAY = 60
+
+
+class DomoStatusListener:
+    """Long poll the server for status changes and push them to the coordinators."""
+
+    def __init__(self, hass: HomeAssistant, hub: DomoClient, coordinators: dict):
+        """Init the listener."""
+        self._hass = hass
+        self._hub = hub
+        self._coordinators = coordinators
+        self._task = None
+
+    def start(self):
+        """Start the background task of the listener."""
+        self._task = self._hass.loop.create_task(self._async_listen())
+
+    async def async_stop(self):
+        """Stop the background task of the listener."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _async_listen(self):
+        """Loop over the status update requests."""
+        retry_delay = MIN_UPDATE_INTERVAL
+
+        while True:
+            started = time.monotonic()
+            try:
+                updates = await self._hub.status_update()
+            except (RequestError, ServerNotFound) as err:
+                _LOGGER.debug("Status update failed, retry in %s seconds: %s", retry_delay, err)
+                # Fall back to regular polling while the push channel is down
+                self._set_push_active(False)
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
+                continue
+
+            # The push channel works, polling is only a safety net
+            retry_delay = MIN_UPDATE_INTERVAL
+            self._set_push_active(True)
+
+            self._dispatch(updates)
+
+            # Do not flood the server if it answers without waiting
+            elapsed = time.monotonic() - started
+            if elapsed < MIN_UPDATE_INTERVAL:
+                await asyncio.sleep(MIN_UPDATE_INTERVAL - elapsed)
+
+    def _dispatch(self, updates: list):
+        """Apply the updates to the snapshot of their category."""
+        by_category = {}
+        for update in updates:
+            category = _category_of(update.get("cmd_name", ""))
+            if category is None or category not in self._coordinators:
+                continue
+            by_category.setdefault(category, []).append(update)
+
+        for category, category_updates in by_category.items():
+            coordinator = self._coordinators[category]
+            # The cached list no longer matches the server
+            self._hub.invalidate_list(category)
+
+            # Updates without an act_id (e.g. a season change) or for unknown
+            # items cannot be applied in place, refresh the whole category
+            if coordinator.data is None or any(
+                update.get("act_id") not in coordinator.data
+                for update in category_updates
+            ):
+                self._hass.async_create_task(coordinator.async_request_refresh())
+                continue
+
+            coordinator.async_apply_updates(category_updates)
+
+    def _set_push_active(self, active: bool):
+        """Tell every coordinator whether the changes are pushed."""
+        for coordinator in self._coordinators.values():
+            coordinator.async_set_push_active(active)
+
+
+def _category_of(cmd_name: str):
+    """Return the category of an update from its cmd_name."""
+    for prefix, category in UPDATE_PREFIXES.items():
+        if cmd_name.startswith(prefix):
+            return category
+    return None
@@ -0,0 +1,138 @@
+"""Metrics of the requests sent to an eti/domo server."""
+import bisect
+
+# Upper bounds of the latency histogram buckets, in seconds, the last one is open
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Commands held open by the server, left out of the average latency
+LONG_POLL_COMMANDS = ("status_update_req",)
+
+
+class CommandStats:
+    """Counters of a single type of command."""
+
+    __slots__ = ("calls", "errors", "relogins", "total_latency", "max_latency", "bytes", "buckets")
+
+    def __init__(self):
+        """Init the counters."""
+        self.calls = 0
+        self.errors = 0
+        self.relogins = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        # Bytes of the received responses
+        self.bytes = 0
+        # Number of calls for every latency bucket, the last one counts the slower calls
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    @property
+    def average_latency(self):
+        """Return the average latency of the calls, in seconds"""
+        return self.total_latency / self.calls if self.calls else 0.0
+
+    def percentile(self, fraction: float):
+        """Return the upper bound of the bucket holding the given fraction of the calls.
+
+        None if there are no calls or the percentile falls in the open bucket.
+        """
+        if not self.calls:
+            return None
+
+        target = fraction * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def as_dict(self) -> dict:
+        """Return the counters as a dictionary."""
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "relogins": self.relogins,
+            "average_latency": round(self.average_latency, 4),
+            "max_latency": round(self.max_latency, 4),
+            "p50_latency": self.percentile(0.5),
+            "p95_latency": self.percentile(0.95),
+            "bytes": self.bytes,
+            "latency_histogram": dict(
+                zip([str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"], self.buckets)
+            ),
+        }
+
+
+class RequestMetrics:
+    """Collect the counters of every type of command sent to a server.
+
+    The commands are identified by the name sent to the server, e.g.
+    ``nested_light_list_req`` or ``sl_keep_alive_req``. Recording a call
+    costs a dictionary lookup and a bisection, so it runs on every request.
+    """
+
+    def __init__(self):
+        """Init the metrics."""
+        self._commands = {}
+
+    def __getitem__(self, command: str) -> CommandStats:
+        """Return the counters of a command, created on first use."""
+        stats = self._commands.get(command)
+        if stats is None:
+            stats = self._commands[command] = CommandStats()
+        return stats
+
+    def __iter__(self):
+        """Iterate over the (command, counters) pairs."""
+        return iter(self._commands.items())
+
+    @property
+    def calls(self):
+        """Return the number of requests sent"""
+        return sum(stats.calls for stats in self._commands.values())
+
+    @property
+    def errors(self):
+        """Return the number of failed or refused requests"""
+        return sum(stats.errors for stats in self._commands.values())
+
+    @property
+    def relogins(self):
+        """Return the number of times the session was renewed"""
+        return sum(stats.relogins for stats in self._commands.values())
+
+    @property
+    def bytes(self):
+        """Return the bytes received from the server"""
+        return sum(stats.bytes for stats in self._commands.values())
+
+    @property
+    def average_latency(self):
+        """Return the average latency of the requests, the long polls excluded, in seconds"""
+        polled = [
+            stats for command, stats in self._commands.items()
+            if command not in LONG_POLL_COMMANDS
+        ]
+        calls = sum(stats.calls for stats in polled)
+        if not calls:
+            return 0.0
+        return sum(stats.total_latency for stats in polled) / calls
+
+    def record(self, command: str, latency: float, size: int = 0, error: bool = False):
+        """Record a request and its outcome."""
+        stats = self[command]
+        stats.calls += 1
+        stats.total_latency += latency
+        stats.max_latency = max(stats.max_latency, latency)
+        stats.bytes += size
+        stats.buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        if error:
+            stats.errors += 1
+
+    def record_relogin(self, command: str):
+        """Record a session renewed because the server refused a request."""
+        self[command].relogins += 1
+
+    def as_dict(self) -> dict:
+        """Return the counters of every command."""
+        return {command: stats.as_dict() for command, stats in self._commands.items()}
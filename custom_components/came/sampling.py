@@ -0,0 +1,64 @@
+"""Sampling of the values of the analog inputs."""
+from collections import deque
+import time
+
+
+class SampleFilter:
+    """Aggregate the samples of an analog input and publish only the significant changes.
+
+    The samples received in the last window seconds are aggregated in their
+    minimum, mean and maximum. The mean becomes the published state only
+    when it moves at least deadband away from the published one, so the
+    noise of the sensor does not reach the state machine nor the recorder.
+    """
+
+    __slots__ = ("_deadband", "_window", "_samples", "state", "minimum", "mean", "maximum")
+
+    def __init__(self, deadband: float, window: float):
+        """Init the filter.
+
+        :param deadband: minimum change of the published state, 0 to publish every change
+        :param window: seconds of samples aggregated, 0 to use the last sample only
+        """
+        self._deadband = deadband
+        self._window = window
+        # Samples of the window, (monotonic time, value)
+        self._samples = deque()
+        self.state = None
+        self.minimum = None
+        self.mean = None
+        self.maximum = None
+
+    def add(self, value, now: float = None) -> bool:
+        """Add a sample and return true if the published state changed."""
+        if value is None:
+            return False
+
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            # Not a number, nothing to aggregate
+            changed = value != self.state
+            self.state = value
+            return changed
+
+        if now is None:
+            now = time.monotonic()
+        self._samples.append((now, value))
+        while self._samples[0][0] < now - self._window:
+            self._samples.popleft()
+
+        values = [sample for _, sample in self._samples]
+        self.minimum = min(values)
+        self.maximum = max(values)
+        self.mean = round(sum(values) / len(values), 2)
+
+        if (
+            isinstance(self.state, float)
+            and abs(self.mean - self.state) < self._deadband
+        ):
+            return False
+
+        changed = self.mean != self.state
+        self.state = self.mean
+        return changed
@@ -0,0 +1,133 @@
+"""Scheduler of the requests sent to an eti/domo server."""
+import asyncio
+from contextlib import asynccontextmanager
+import heapq
+import itertools
+import time
+
+# Priority of the requests issued by the user, served first
+PRIORITY_COMMAND = 0
+# Priority of the background refreshes
+PRIORITY_REFRESH = 1
+
+
+class RequestScheduler:
+    """Limit the concurrency and the rate of the requests sent to a server.
+
+    The eti/domo server is a small embedded box, so at most max_concurrent
+    requests are in flight and at most max_rate requests are started every
+    second. The waiting requests are served by priority, then in order of
+    arrival, so the commands of the user overtake the queued refreshes.
+    """
+
+    def __init__(self, max_concurrent: int, max_rate: float):
+        """Init the scheduler with the given budget.
+
+        :param max_rate: requests started per second, 0 for no limit
+        """
+        self._max_concurrent = max_concurrent
+        self._interval = 1.0 / max_rate if max_rate else 0.0
+        # Waiting requests, heap of (priority, arrival, future)
+        self._waiting = []
+        self._arrival = itertools.count()
+        self._in_flight = 0
+        # Monotonic time at which the next request can be started
+        self._next_start = 0.0
+        self._wakeup = None
+
+        # Number of requests and wait times, by priority
+        self._requests = {PRIORITY_COMMAND: 0, PRIORITY_REFRESH: 0}
+        self._total_wait = {PRIORITY_COMMAND: 0.0, PRIORITY_REFRESH: 0.0}
+        self._max_wait = {PRIORITY_COMMAND: 0.0, PRIORITY_REFRESH: 0.0}
+
+    @property
+    def queue_depth(self):
+        """Return the number of requests waiting for their turn"""
+        return sum(1 for _, _, future in self._waiting if not future.done())
+
+    @property
+    def in_flight(self):
+        """Return the number of requests sent and not answered yet"""
+        return self._in_flight
+
+    def average_wait(self, priority: int) -> float:
+        """Return the average time spent in the queue by the requests of a priority."""
+        if not self._requests[priority]:
+            return 0.0
+        return self._total_wait[priority] / self._requests[priority]
+
+    def max_wait(self, priority: int) -> float:
+        """Return the longest time spent in the queue by a request of a priority."""
+        return self._max_wait[priority]
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_REFRESH):
+        """Wait for the turn of a request and hold its slot until the block exits."""
+        queued = time.monotonic()
+        await self._async_acquire(priority)
+        self._record_wait(priority, time.monotonic() - queued)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _async_acquire(self, priority: int):
+        """Wait until the request can be started."""
+        if not self._waiting and self._can_start(time.monotonic()):
+            self._start(time.monotonic())
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._arrival), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been granted right before the cancellation
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _can_start(self, now: float) -> bool:
+        """Return true if the budget allows to start a request now."""
+        return self._in_flight < self._max_concurrent and now >= self._next_start
+
+    def _start(self, now: float):
+        """Take a slot for a request started now."""
+        self._in_flight += 1
+        self._next_start = now + self._interval
+
+    def _release(self):
+        """Free the slot of a finished request and start the next ones."""
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Start the waiting requests allowed by the budget."""
+        while self._waiting and self._in_flight < self._max_concurrent:
+            now = time.monotonic()
+            if now < self._next_start:
+                # Come back when the rate limit allows the next request
+                if self._wakeup is None:
+                    self._wakeup = asyncio.get_running_loop().call_later(
+                        self._next_start - now, self._async_wakeup
+                    )
+                return
+
+            _, _, future = heapq.heappop(self._waiting)
+            if future.done():
+                # The request was cancelled while waiting
+                continue
+            self._start(now)
+            future.set_result(None)
+
+    def _async_wakeup(self):
+        """Start the requests delayed by the rate limit."""
+        self._wakeup = None
+        self._dispatch()
+
+    def _record_wait(self, priority: int, wait: float):
+        """Account the time a request spent in the queue."""
+        self._requests[priority] += 1
+        self._total_wait[priority] += wait
+        self._max_wait[priority] = max(self._max_wait[priority], wait)
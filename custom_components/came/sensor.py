@@ -1,77 +1,216 @@
 """Platform for light integration."""
 import logging
 
-import voluptuous as vol
-
-import homeassistant.helpers.config_validation as cv
-
-from homeassistant.const import DEVICE_CLASS_HUMIDITY, UNIT_PERCENTAGE
+from homeassistant.const import (
+    DATA_KILOBYTES,
+    DEVICE_CLASS_HUMIDITY,
+    TIME_MILLISECONDS,
+    UNIT_PERCENTAGE,
+)
 
 from homeassistant.helpers.entity import Entity
 
-from eti_domo import Domo, ServerNotFound
+from .api import DomoClient
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CONF_ANALOG_DEADBAND,
+    CONF_ANALOG_WINDOW,
+    DEFAULT_ANALOG_DEADBAND,
+    DEFAULT_ANALOG_WINDOW,
+)
+from .entity import CameEntity
+from .sampling import SampleFilter
+from .snapshot import AnalogRecord
 
 _LOGGER = logging.getLogger(__name__)
 
+# Attributes of the aggregated samples of an analog input
+ATTR_MIN = "min"
+ATTR_MEAN = "mean"
+ATTR_MAX = "max"
+
+# Diagnostic sensors of every hub, (key, name, unit, state, attributes)
+DIAGNOSTIC_SENSORS = (
+    (
+        "requests",
+        "requests",
+        None,
+        lambda hub: hub.metrics.calls,
+        lambda hub: {command: stats.calls for command, stats in hub.metrics},
+    ),
+    (
+        "request_errors",
+        "request errors",
+        None,
+        lambda hub: hub.metrics.errors,
+        lambda hub: {command: stats.errors for command, stats in hub.metrics},
+    ),
+    (
+        "relogins",
+        "relogins",
+        None,
+        lambda hub: hub.metrics.relogins,
+        lambda hub: {command: stats.relogins for command, stats in hub.metrics},
+    ),
+    (
+        "request_latency",
+        "request latency",
+        TIME_MILLISECONDS,
+        lambda hub: round(hub.metrics.average_latency * 1000, 1),
+        lambda hub: {
+            command: round(stats.average_latency * 1000, 1) for command, stats in hub.metrics
+        },
+    ),
+    (
+        "received_data",
+        "received data",
+        DATA_KILOBYTES,
+        lambda hub: round(hub.metrics.bytes / 1024, 1),
+        lambda hub: {command: stats.bytes for command, stats in hub.metrics},
+    ),
+    (
+        "request_queue",
+        "request queue",
+        None,
+        lambda hub: hub.scheduler.queue_depth,
+        lambda hub: hub.scheduler_state,
+    ),
+)
+
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the Hue lights from a config entry."""
 
+    # Get the hub of the config entry
+    came_hub = hass.data[DOMAIN][config_entry.entry_id]
     # Get the Domo object
-    hub = hass.data[DOMAIN]["hub"]
-
-    # Retrieve all the sensors from the eti/domo server
-    analogs = hub.list_request(Domo.available_commands['analogin'])['array']
-
-    # Add all the lights as entities
-    async_add_entities(CameHygrometer(hub, sensor) for sensor in analogs)
-
-class CameHygrometer(Entity):
+    hub = came_hub.client
+
+    # Add the diagnostic sensors of the hub
+    async_add_entities(
+        [
+            CameDiagnosticSensor(came_hub, config_entry, *description)
+            for description in DIAGNOSTIC_SENSORS
+        ]
+    )
+
+    # The server may not have analog inputs
+    if "analogin" not in came_hub.coordinators:
+        return
+
+    # Get the coordinator of the analog inputs
+    coordinator = came_hub.coordinators["analogin"]
+    # Get the sampling options of the analog inputs
+    deadband = config_entry.options.get(CONF_ANALOG_DEADBAND, DEFAULT_ANALOG_DEADBAND)
+    window = config_entry.options.get(CONF_ANALOG_WINDOW, DEFAULT_ANALOG_WINDOW)
+
+    # Add all the sensors known by the coordinator as entities
+    came_hub.topology.async_add_platform(
+        "analogin",
+        coordinator.data,
+        async_add_entities,
+        lambda sensor, snapshot: CameHygrometer(
+            hub,
+            sensor,
+            coordinator,
+            SampleFilter(deadband, window),
+            **came_hub.entity_kwargs("analogin", sensor, snapshot),
+        ),
+    )
+
+class CameHygrometer(CameEntity):
     """Representation of XBee Pro temperature sensor."""
 
-    def __init__(self, hub: Domo, sensor):
+    # The window is sampled on every poll, even if the value did not change
+    sample_every_update = True
+
+    def __init__(
+        self,
+        hub: DomoClient,
+        sensor: AnalogRecord,
+        coordinator,
+        sampling: SampleFilter,
+        unique_id: str,
+        device_info: dict,
+    ):
         """Init switch device."""
-        self.entity_id = "sensor." + sensor['name'].lower().replace(" ", "_") + "_" + str(sensor['act_id'])
-        self._name = sensor['name']
-        self._id = sensor['act_id']
+        super().__init__(coordinator, sensor, unique_id, device_info)
         self._hub = hub
-        self._value = sensor['value']
-        self._unit_of_measurement = sensor['unit']
+        self._sampling = sampling
+        self._sampling.add(sensor.value)
+
+    @property
+    def state(self):
+        """Return the state of the sensor. (mean of the samples of the window)"""
+        return self._sampling.state
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement the value is expressed in."""
+        return self._item.unit
+
+    @property
+    def device_class(self):
+        """Return the class of the sensor, known only for the hygrometers."""
+        if self._item.unit == UNIT_PERCENTAGE:
+            return DEVICE_CLASS_HUMIDITY
+        return None
+
+    @property
+    def device_state_attributes(self):
+        """Return the aggregated samples of the window."""
+        attributes = super().device_state_attributes or {}
+        if self._sampling.mean is not None:
+            attributes[ATTR_MIN] = self._sampling.minimum
+            attributes[ATTR_MEAN] = self._sampling.mean
+            attributes[ATTR_MAX] = self._sampling.maximum
+        return attributes or None
+
+    def _update_from_item(self, sensor: AnalogRecord):
+        """Sample the value of the sensor, False if the state did not change significantly."""
+        super()._update_from_item(sensor)
+        return self._sampling.add(sensor.value)
+
+
+class CameDiagnosticSensor(Entity):
+    """Metric of the requests sent by a hub to its server."""
+
+    def __init__(self, came_hub, config_entry, key, name, unit, state, attributes):
+        """Init the diagnostic sensor."""
+        self._hub = came_hub
+        self._unique_id = f"{came_hub.serial}_diagnostic_{key}"
+        self._name = f"{config_entry.title} {name}"
+        self._unit_of_measurement = unit
+        self._state = state
+        self._attributes = attributes
 
     @property
     def unique_id(self):
-        """Return unique ID for this device."""
-        return self.entity_id
+        """Return unique ID for this sensor."""
+        return self._unique_id
 
     @property
     def name(self):
         """Return the name of the sensor."""
         return self._name
 
+    @property
+    def device_info(self):
+        """Return the device of the server."""
+        return self._hub.devices.server_info
+
     @property
     def state(self):
-        """Return the state of the sensor. (current value)"""
-        return self._value
+        """Return the current value of the metric."""
+        return self._state(self._hub)
 
     @property
     def unit_of_measurement(self):
         """Return the unit of measurement the value is expressed in."""
         return self._unit_of_measurement
 
-    def update(self):
-        """Get the latest data."""
-
-        # Send a keep alive request
-        self._hub.keep_alive()
-
-        # Retrieve all the sensors from the eti/domo server
-        analogs = self._hub.list_request(Domo.available_commands['analogin'])['array']
-
-        # Search for the sensor
-        for sensor in analogs:
-            if sensor['act_id'] == self._id:
-                # update the value
-                self._value = sensor['value']
-
+    @property
+    def device_state_attributes(self):
+        """Return the value of the metric for every command."""
+        return self._attributes(self._hub)
@@ -0,0 +1,117 @@
+"""Services switching the lights of a whole area and dumping the diagnostics."""
+import asyncio
+import json
+import logging
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+
+from .api import RequestError, ServerNotFound
+from .const import (
+    DOMAIN,
+    ATTR_FLOOR,
+    ATTR_ROOM,
+    SERVICE_ALL_OFF,
+    SERVICE_DUMP_DIAGNOSTICS,
+    SERVICE_TURN_OFF_FLOOR,
+    SERVICE_TURN_OFF_ROOM,
+    SERVICE_TURN_ON_FLOOR,
+    SERVICE_TURN_ON_ROOM,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+ROOM_SCHEMA = vol.Schema(
+    {vol.Required(ATTR_ROOM): cv.string, vol.Optional(ATTR_FLOOR): cv.string}
+)
+FLOOR_SCHEMA = vol.Schema({vol.Required(ATTR_FLOOR): cv.string})
+ALL_SCHEMA = vol.Schema({})
+
+# Schema and wanted status of every service
+SERVICES = {
+    SERVICE_TURN_ON_ROOM: (ROOM_SCHEMA, True),
+    SERVICE_TURN_OFF_ROOM: (ROOM_SCHEMA, False),
+    SERVICE_TURN_ON_FLOOR: (FLOOR_SCHEMA, True),
+    SERVICE_TURN_OFF_FLOOR: (FLOOR_SCHEMA, False),
+    SERVICE_ALL_OFF: (ALL_SCHEMA, False),
+}
+
+
+def async_register_services(hass: HomeAssistant):
+    """Register the services, once for all the config entries."""
+    if hass.services.has_service(DOMAIN, SERVICE_ALL_OFF):
+        return
+
+    async def async_handle(call: ServiceCall):
+        """Switch the lights of the area of the call on every hub."""
+        status = SERVICES[call.service][1]
+        floor = call.data.get(ATTR_FLOOR)
+        room = call.data.get(ATTR_ROOM)
+
+        requests = []
+        for hub in hass.data[DOMAIN].values():
+            coordinator = hub.coordinators.get("lights")
+            if coordinator is None or coordinator.data is None:
+                continue
+            act_ids = _lights_of_area(coordinator.data, floor, room)
+            if act_ids:
+                requests.append(hub.queue.async_switch_many(act_ids, status, is_light=True))
+
+        if not requests:
+            _LOGGER.warning("No lights found for %s", dict(call.data) or "the installation")
+            return
+
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        for result in results:
+            if isinstance(result, (RequestError, ServerNotFound)):
+                raise HomeAssistantError(f"Unable to switch the lights: {result}") from result
+            if isinstance(result, Exception):
+                raise result
+
+    for service, (schema, _) in SERVICES.items():
+        hass.services.async_register(DOMAIN, service, async_handle, schema=schema)
+
+    async def async_dump_diagnostics(call: ServiceCall):
+        """Log the metrics of the requests and the state of every hub."""
+        for hub in hass.data[DOMAIN].values():
+            # Logged as a warning to be shown by the default logger configuration
+            _LOGGER.warning(
+                "Diagnostics of %s: %s",
+                hub.serial,
+                json.dumps(hub.diagnostics, indent=2, default=str),
+            )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_DUMP_DIAGNOSTICS, async_dump_diagnostics, schema=vol.Schema({})
+    )
+
+
+def async_unregister_services(hass: HomeAssistant):
+    """Remove the services when the last config entry is unloaded."""
+    for service in SERVICES:
+        hass.services.async_remove(DOMAIN, service)
+    hass.services.async_remove(DOMAIN, SERVICE_DUMP_DIAGNOSTICS)
+
+
+def _lights_of_area(snapshot, floor: str = None, room: str = None) -> list:
+    """Return the act_id of the lights in the rooms matching the names.
+
+    The names are compared ignoring the case, a missing name matches every
+    floor or room.
+    """
+    act_ids = []
+    for (floor_ind, room_ind), lights in snapshot.rooms.items():
+        if floor is not None and not _same_name(snapshot.floor_name(floor_ind), floor):
+            continue
+        if room is not None and not _same_name(snapshot.room_name(floor_ind, room_ind), room):
+            continue
+        act_ids.extend(lights)
+    return act_ids
+
+
+def _same_name(name: str, wanted: str) -> bool:
+    """Return true if the names are equal ignoring the case and the surrounding spaces."""
+    return name is not None and name.strip().casefold() == wanted.strip().casefold()
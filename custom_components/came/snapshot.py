@@ -0,0 +1,299 @@
+"""Indexed view over the lists returned by the eti/domo server."""
+from operator import attrgetter
+
+
+def _tenths(value):
+    """Convert tenths of degree, as sent by the server, to degrees."""
+    return float(value) / 10.0
+
+
+class DomoRecord:
+    """Compact state of an item, built once per payload and shared by the entities.
+
+    Every subclass lists its fields in __slots__, and optionally the
+    converters applied to the raw values of the payload.
+    """
+
+    __slots__ = ("act_id", "name")
+
+    # All the fields of the record, the inherited ones included
+    fields = __slots__
+    # Values of all the fields, used to compare the records
+    _values = attrgetter(*fields)
+    # Raw value converters, field -> callable
+    converters = {}
+    # Fields describing the topology of the installation
+    topology_fields = ("act_id", "name")
+    # Fields shown by the entities
+    tracked_fields = ("name",)
+
+    def __init_subclass__(cls, **kwargs):
+        """Collect the fields of the subclass."""
+        super().__init_subclass__(**kwargs)
+        cls.fields = cls.__mro__[1].fields + cls.__slots__
+        cls._values = attrgetter(*cls.fields)
+
+    def __init__(self, item: dict):
+        """Build the record from a decoded item of the payload."""
+        for field in self.fields:
+            self._set_raw(field, item.get(field))
+
+    def updated(self, update: dict):
+        """Return a copy of the record with the fields of the update applied."""
+        record = object.__new__(type(self))
+        for field in self.fields:
+            if field in update:
+                record._set_raw(field, update[field])
+            else:
+                setattr(record, field, getattr(self, field))
+        return record
+
+    def __eq__(self, other):
+        """Return true if all the fields are equal, as the items they were built from."""
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._values(self) == other._values(other)
+
+    __hash__ = None
+
+    def differs_from(self, other) -> bool:
+        """Return true if a field shown by the entities differs."""
+        return any(
+            getattr(self, field) != getattr(other, field) for field in self.tracked_fields
+        )
+
+    def topology(self) -> dict:
+        """Return the raw fields describing the topology of the item."""
+        return {
+            field: getattr(self, field)
+            for field in self.topology_fields
+            if getattr(self, field) is not None
+        }
+
+    def _set_raw(self, field: str, value):
+        """Set a field from its raw value."""
+        converter = self.converters.get(field)
+        if converter is not None and value is not None:
+            value = converter(value)
+        setattr(self, field, value)
+
+
+class LightRecord(DomoRecord):
+    """State of a light."""
+
+    __slots__ = ("floor_ind", "room_ind", "status")
+
+    topology_fields = ("act_id", "name", "floor_ind", "room_ind")
+    tracked_fields = ("name", "status")
+
+
+class RelayRecord(DomoRecord):
+    """State of a relay."""
+
+    __slots__ = ("status",)
+
+    tracked_fields = ("name", "status")
+
+
+class AnalogRecord(DomoRecord):
+    """State of an analog input."""
+
+    __slots__ = ("value", "unit")
+
+    topology_fields = ("act_id", "name", "unit")
+    tracked_fields = ("name", "value", "unit")
+
+
+class ThermoRecord(DomoRecord):
+    """State of a thermo zone, temperatures in degrees."""
+
+    __slots__ = ("status", "temp", "mode", "set_point", "season", "hygro")
+
+    converters = {"temp": _tenths, "set_point": _tenths}
+    tracked_fields = ("name", "status", "temp", "set_point", "mode", "season", "hygro")
+
+
+def decode_light(item: dict):
+    """Turn a light into its record as soon as the json decoder parsed it.
+
+    Used as object hook of the list of the lights, every light becomes a
+    record before the next one is parsed, so the decoded payload holds only
+    the floors and rooms as dicts. The floors and the rooms have no act_id
+    and are left untouched.
+    """
+    if "act_id" in item:
+        return LightRecord(item)
+    return item
+
+
+# Record class of the items of every category
+RECORD_CLASSES = {
+    "lights": LightRecord,
+    "relays": RelayRecord,
+    "analogin": AnalogRecord,
+    "thermoregulation": ThermoRecord,
+}
+
+
+class DomoSnapshot:
+    """Decoded list of a category, indexed by act_id.
+
+    The index is built once per fetched payload and shared by all the entities
+    of the category, which resolve their own record with a dictionary lookup.
+    """
+
+    __slots__ = (
+        "_category",
+        "_payload",
+        "_items",
+        "_locations",
+        "_rooms",
+        "_floor_names",
+        "_room_names",
+    )
+
+    def __init__(self, category: str, payload: list):
+        """Build the index of the payload."""
+        self._category = category
+        self._payload = payload
+
+        record_class = RECORD_CLASSES.get(category, DomoRecord)
+
+        # Records of the category keyed by their act_id
+        self._items = {}
+        # Position of the lights, act_id -> (floor_ind, room_ind)
+        self._locations = {}
+        # Lights contained in every room, (floor_ind, room_ind) -> [act_id, ...]
+        self._rooms = {}
+        # Names of the floors and of the rooms
+        self._floor_names = {}
+        self._room_names = {}
+
+        if category == "lights":
+            # The lights are nested inside floors and rooms
+            for floor in payload:
+                self._floor_names[floor['floor_ind']] = floor['name']
+                for room in floor['array']:
+                    location = (floor['floor_ind'], room['room_ind'])
+                    self._room_names[location] = room['name']
+                    self._rooms[location] = []
+                    for light in room['array']:
+                        # The lights may already be records, see decode_light
+                        if not isinstance(light, DomoRecord):
+                            light = record_class(light)
+                        self._items[light.act_id] = light
+                        self._locations[light.act_id] = location
+                        self._rooms[location].append(light.act_id)
+        else:
+            for item in payload:
+                self._items[item['act_id']] = record_class(item)
+
+    @property
+    def category(self):
+        """Return the category of the items"""
+        return self._category
+
+    @property
+    def payload(self):
+        """Return the decoded payload the index was built from"""
+        return self._payload
+
+    @property
+    def rooms(self):
+        """Return the act_id of the lights of every (floor_ind, room_ind)"""
+        return self._rooms
+
+    def __contains__(self, act_id):
+        """Return true if the item is part of the snapshot."""
+        return act_id in self._items
+
+    def __iter__(self):
+        """Iterate over the records of the snapshot."""
+        return iter(self._items.values())
+
+    def __len__(self):
+        """Return the number of items of the snapshot."""
+        return len(self._items)
+
+    def get(self, act_id):
+        """Return the record with the given act_id, None if it does not exist."""
+        return self._items.get(act_id)
+
+    def location(self, act_id):
+        """Return the (floor_ind, room_ind) of a light."""
+        return self._locations.get(act_id)
+
+    def floor_name(self, floor_ind):
+        """Return the name of a floor."""
+        return self._floor_names.get(floor_ind)
+
+    def room_name(self, floor_ind, room_ind):
+        """Return the name of a room."""
+        return self._room_names.get((floor_ind, room_ind))
+
+    def is_same_payload(self, payload: list):
+        """Return true if the payload is equal to the indexed one."""
+        return self._payload is not None and self._payload == payload
+
+    def with_updates(self, updates: list):
+        """Return a new snapshot with the changed fields of the updates applied.
+
+        The updated snapshot is no longer bound to a payload, so the next
+        fetched payload always rebuilds the index. The records that are not
+        updated are shared with this snapshot.
+        """
+        snapshot = object.__new__(DomoSnapshot)
+        for attribute in self.__slots__:
+            setattr(snapshot, attribute, getattr(self, attribute))
+        snapshot._payload = None
+        snapshot._items = dict(self._items)
+
+        for update in updates:
+            act_id = update['act_id']
+            if act_id in snapshot._items:
+                snapshot._items[act_id] = snapshot._items[act_id].updated(update)
+
+        return snapshot
+
+    def changes_from(self, previous):
+        """Return the act_id of the items that differ from the previous snapshot.
+
+        Only the fields shown by the entities are compared, added and
+        removed items are part of the changes too.
+        """
+        changed = set()
+
+        for act_id, record in self._items.items():
+            old = previous.get(act_id)
+            if old is None or (record is not old and record.differs_from(old)):
+                changed.add(act_id)
+
+        # Removed items
+        changed.update(act_id for act_id in previous._items if act_id not in self._items)
+
+        return changed
+
+    def topology(self):
+        """Return the payload trimmed to the fields describing the topology.
+
+        The returned payload has the same shape of the original one, so a
+        snapshot can be built from it.
+        """
+        if self._category != "lights":
+            return [record.topology() for record in self._items.values()]
+
+        floors = {}
+        for (floor_ind, room_ind), act_ids in self._rooms.items():
+            floor = floors.setdefault(
+                floor_ind,
+                {"floor_ind": floor_ind, "name": self._floor_names[floor_ind], "array": []},
+            )
+            floor["array"].append(
+                {
+                    "room_ind": room_ind,
+                    "name": self._room_names[(floor_ind, room_ind)],
+                    "array": [self._items[act_id].topology() for act_id in act_ids],
+                }
+            )
+
+        return list(floors.values())
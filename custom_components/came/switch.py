@@ -1,24 +1,36 @@
 """Component to interface with switches that can be controlled remotely."""
 import logging
 
-from homeassistant.components.switch import ENTITY_ID_FORMAT, SwitchDevice
+from homeassistant.components.switch import SwitchDevice
 
-from eti_domo import Domo, ServerNotFound
+from .api import DomoClient
 
 from .const import DOMAIN
+from .entity import CameEntity
+from .snapshot import RelayRecord
 
 _LOGGER = logging.getLogger(__name__)
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up a config entry."""
 
+    # Get the hub of the config entry
+    came_hub = hass.data[DOMAIN][config_entry.entry_id]
     # Get the Domo object
-    hub = hass.data[DOMAIN]["hub"]
-    # Retrieve the list of relays
-    relays = hub.list_request(Domo.available_commands['relays'])['array']
-
-    # Add all the relays
-    async_add_entities(Relay(hub, relay) for relay in relays)
+    hub = came_hub.client
+    # Get the coordinator of the relays
+    coordinator = came_hub.coordinators["relays"]
+    # Get the queue of the commands
+    queue = came_hub.queue
+    # Add all the relays known by the coordinator
+    came_hub.topology.async_add_platform(
+        "relays",
+        coordinator.data,
+        async_add_entities,
+        lambda relay, snapshot: Relay(
+            hub, relay, coordinator, queue, **came_hub.entity_kwargs("relays", relay, snapshot)
+        ),
+    )
 
 
 #async def async_unload_entry(hass, entry):
@@ -26,70 +38,32 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
 #    return await hass.data[DOMAIN].async_unload_entry(entry)
 
 
-class Relay(SwitchDevice):
+class Relay(CameEntity, SwitchDevice):
     """Representation of a switch."""
 
-    def __init__(self, hub: Domo, relay):
+    def __init__(self, hub: DomoClient, relay: RelayRecord, coordinator, queue, unique_id: str, device_info: dict):
         """Init switch device."""
-        self.entity_id = "switch." + relay['name'].lower().replace(" ", "_") + "_" + str(relay['act_id'])
-        self._name = relay['name']
-        self._id = relay['act_id']
+        super().__init__(coordinator, relay, unique_id, device_info)
         self._hub = hub
-        self._status = relay['status']
-
-    @property
-    def unique_id(self):
-        """Return unique ID for this device."""
-        return self.entity_id
-
-    @property
-    def name(self):
-        """Return the display name of this light."""
-        return self._name
+        self._queue = queue
 
     @property
     def is_on(self):
         """Return true if switch is on."""
-        return self._status
-        
-
-    def update(self):
-        """Fetch new state data for this relay.
-        This is the only method that should fetch new data for Home Assistant.
-        """
-
-        # Send a keep alive request
-        self._hub.keep_alive()
-        
-        # Retrieve the list of relays
-        relays = self._hub.list_request(Domo.available_commands['relays'])['array']
-
-        # Search for the relay
-        for relay in relays:
-            if relay['act_id'] == self._id:
-                # update the status
-                self._status = relay['status']
-
-    def turn_on(self, **kwargs):
-        """Turn the switch on."""
-
-        # Send a keep alive request
-        self._hub.keep_alive()
+        return self._field("status")
 
-        # Turn on the light
-        self._hub.switch(self._id, status=True, is_light=False)
+    async def async_turn_on(self, **kwargs):
+        """Turn the switch on."""
 
-        # Update the status
-        self.update()
+        # Turn on the relay
+        await self._async_send_optimistic(
+            self._queue.async_switch(self._id, True, is_light=False), status=True
+        )
 
-    def turn_off(self, **kwargs):
+    async def async_turn_off(self, **kwargs):
         """Turn the device off."""
 
-        # Send a keep alive request
-        self._hub.keep_alive()
-
-        # Turn on the light
-        self._hub.switch(self._id, status=False, is_light=False)
-
-        # Update the status
-        self.update()
+        # Turn off the relay
+        await self._async_send_optimistic(
+            self._queue.async_switch(self._id, False, is_light=False), status=False
+        )
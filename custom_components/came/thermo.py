@@ -0,0 +1,170 @@
+"""Controller coalescing the changes sent to the thermo zones."""
+import asyncio
+import logging
+
+from homeassistant.core import HomeAssistant
+
+from .api import DomoClient, RequestError, ServerNotFound
+from .commands import COMMAND_WINDOW, resolve_futures
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PendingZone:
+    """Wanted mode and set point of a thermo zone, with the callers waiting for them."""
+
+    def __init__(self):
+        """Init the pending change."""
+        self.mode = None
+        self.set_point = None
+        self.futures = []
+
+
+class ThermoController:
+    """Collect the changes of the thermo zones issued in a short window.
+
+    The season is global to the installation, so it is sent at most once
+    per batch and only when it differs from the known one. A change asking
+    for another season sends the batch queued so far first, the batches are
+    sent one after the other. The mode and the
+    set point of every zone are merged into a single configuration request,
+    the zones of the batch are configured together, and the thermo zones are
+    refreshed once at the end.
+    """
+
+    def __init__(self, hass: HomeAssistant, hub: DomoClient, coordinators: dict):
+        """Init the controller."""
+        self._hass = hass
+        self._hub = hub
+        self._coordinators = coordinators
+        # Pending changes, act_id -> PendingZone
+        self._pending = {}
+        # Season wanted by the pending changes, None to keep the current one
+        self._wanted_season = None
+        # Season sent to the server and not yet confirmed by a refresh
+        self._sent_season = None
+        self._flush_handle = None
+        # The batches are sent one at a time, in order
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def season(self):
+        """Return the season of the installation, None if unknown"""
+        if self._sent_season is not None:
+            return self._sent_season
+
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        for zone in snapshot:
+            if zone.season is not None:
+                return zone.season
+        return None
+
+    @property
+    def _snapshot(self):
+        """Return the last snapshot of the thermo zones, None if unknown."""
+        coordinator = self._coordinators.get("thermoregulation")
+        return None if coordinator is None else coordinator.data
+
+    async def async_configure(
+        self, act_id: int, season: str = None, mode: int = None, set_point: float = None
+    ):
+        """Queue a change of a thermo zone and wait until it is sent.
+
+        The missing values keep the current ones of the zone.
+        :param season: season of the whole installation, as named by the server
+        :raises RequestError: if the server refuses the change
+        :raises ServerNotFound: if the server is not reachable
+        """
+        # The season is global, the zones queued for another one are sent first
+        if season is not None and self._wanted_season not in (None, season):
+            self._flush()
+
+        zone = self._pending.get(act_id)
+        if zone is None:
+            zone = self._pending[act_id] = PendingZone()
+
+        # A later change of the same value replaces the previous one
+        if mode is not None:
+            zone.mode = mode
+        if set_point is not None:
+            zone.set_point = set_point
+        if season is not None:
+            self._wanted_season = season
+
+        future = self._hass.loop.create_future()
+        zone.futures.append(future)
+
+        if self._flush_handle is None:
+            self._flush_handle = self._hass.loop.call_later(COMMAND_WINDOW, self._flush)
+
+        await future
+
+    def _flush(self):
+        """Take the pending changes as a batch and send it in the background."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        season, self._wanted_season = self._wanted_season, None
+        self._hass.async_create_task(self._async_flush(pending, season))
+
+    async def _async_flush(self, pending: dict, season: str):
+        """Send a batch once the previous ones are sent."""
+        async with self._flush_lock:
+            await self._async_send(pending, season)
+
+    async def _async_send(self, pending: dict, season: str):
+        """Send the season and the configuration of the zones, then refresh once."""
+        if season is not None and season != self.season:
+            try:
+                await self._hub.change_season(season)
+            except (RequestError, ServerNotFound) as err:
+                for zone in pending.values():
+                    resolve_futures(zone.futures, err)
+                return
+            self._sent_season = season
+        elif season is not None:
+            _LOGGER.debug("Season already %s, not sending it", season)
+
+        snapshot = self._snapshot
+        batch = []
+        for act_id, zone in pending.items():
+            record = None if snapshot is None else snapshot.get(act_id)
+            current_mode = None if record is None else record.mode
+            current_set_point = None if record is None else record.set_point
+            mode = zone.mode if zone.mode is not None else current_mode
+            set_point = zone.set_point if zone.set_point is not None else current_set_point
+
+            if mode is None or set_point is None:
+                resolve_futures(
+                    zone.futures, RequestError(f"Unknown state of thermo zone {act_id}")
+                )
+                continue
+
+            # The zone is already configured this way
+            if mode == current_mode and round(set_point, 1) == round(current_set_point, 1):
+                resolve_futures(zone.futures)
+                continue
+
+            batch.append((act_id, mode, set_point, zone))
+
+        results = await asyncio.gather(
+            *[
+                self._hub.thermo_mode(act_id, mode, set_point)
+                for act_id, mode, set_point, _ in batch
+            ],
+            return_exceptions=True,
+        )
+        for (_, _, _, zone), result in zip(batch, results):
+            resolve_futures(zone.futures, result if isinstance(result, Exception) else None)
+
+        # A single refresh for the whole batch, then keep polling fast for a while
+        coordinator = self._coordinators.get("thermoregulation")
+        if coordinator is None or (not batch and self._sent_season is None):
+            return
+        coordinator.async_boost()
+        await coordinator.async_refresh()
+        # The refreshed zones tell the season from now on
+        self._sent_season = None
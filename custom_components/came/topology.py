@@ -0,0 +1,136 @@
+"""Topology of the installation, cached on disk and reconciled with the server."""
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_registry import async_get_registry
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .snapshot import DomoSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+# Consecutive checks an item must be missing from before its entity is removed
+REMOVE_AFTER_CHECKS = 3
+
+
+class CameTopology:
+    """Keep track of the items of the installation and of their entities.
+
+    The topology (act_id, names, floors and rooms) is saved on disk keyed by
+    the serial of the server, so the entities can be created at startup
+    before the server answers. Every time the lists are reconciled, the
+    entities of the added items are created, the ones of the removed items
+    deleted and the renamed ones updated, without reloading the entry. A
+    server that is booting may return partial lists, so an item is removed
+    only after it has been missing from REMOVE_AFTER_CHECKS checks in a row.
+    """
+
+    def __init__(self, hass: HomeAssistant, serial: str):
+        """Init the topology of the server with the given serial."""
+        self._hass = hass
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{serial}")
+        self._saved = None
+        # Platforms registered for every category, category -> (async_add_entities, factory)
+        self._platforms = {}
+        # Entities created for every category, category -> {act_id: entity}
+        self._entities = {}
+        # Consecutive checks the items were missing from, category -> {act_id: checks}
+        self._missing = {}
+
+    async def async_load(self):
+        """Return the cached snapshot of every category, None if nothing is cached."""
+        self._saved = await self._store.async_load()
+        if not self._saved:
+            return None
+
+        return {
+            category: DomoSnapshot(category, payload)
+            for category, payload in self._saved.items()
+        }
+
+    async def async_remove(self):
+        """Delete the cached topology."""
+        self._saved = None
+        await self._store.async_remove()
+
+    async def async_save(self, snapshots: dict):
+        """Save the topology of the snapshots if it changed."""
+        topology = {
+            category: snapshot.topology() for category, snapshot in snapshots.items()
+        }
+        if topology == self._saved:
+            return
+
+        self._saved = topology
+        await self._store.async_save(topology)
+
+    @callback
+    def async_add_platform(self, category: str, snapshot: DomoSnapshot, async_add_entities, factory):
+        """Create the entities of the items of a category.
+
+        :param factory: callable building the entity of an item, given the item and the snapshot
+        """
+        self._platforms[category] = (async_add_entities, factory)
+        self._entities[category] = {}
+        self._missing[category] = {}
+        self._async_add(category, snapshot, list(snapshot))
+
+    async def async_reconcile(self, category: str, snapshot: DomoSnapshot):
+        """Update the entities of the items added, removed and renamed on the server."""
+        if category not in self._platforms:
+            return
+
+        entities = self._entities[category]
+        added = [item for item in snapshot if item.act_id not in entities]
+
+        # The items back in the list are no longer missing
+        missing = {
+            act_id: self._missing[category].get(act_id, 0) + 1
+            for act_id in entities
+            if act_id not in snapshot
+        }
+        self._missing[category] = missing
+        removed = [act_id for act_id, checks in missing.items() if checks >= REMOVE_AFTER_CHECKS]
+        if len(removed) < len(missing):
+            _LOGGER.debug(
+                "%s %s missing from the list, waiting before removing them",
+                len(missing) - len(removed),
+                category,
+            )
+        renamed = [
+            item for item in snapshot
+            if item.act_id in entities and entities[item.act_id].name != item.name
+        ]
+
+        for item in renamed:
+            _LOGGER.info("Renaming %s %s to %s", category, item.act_id, item.name)
+            entities[item.act_id].async_rename(item.name)
+
+        if added:
+            _LOGGER.info("Adding %s new %s", len(added), category)
+            self._async_add(category, snapshot, added)
+
+        if removed:
+            _LOGGER.info("Removing %s %s no longer on the server", len(removed), category)
+            registry = await async_get_registry(self._hass)
+            for act_id in removed:
+                del missing[act_id]
+                entity = entities.pop(act_id)
+                if entity.entity_id in registry.entities:
+                    registry.async_remove(entity.entity_id)
+                else:
+                    await entity.async_remove()
+
+    @callback
+    def _async_add(self, category: str, snapshot: DomoSnapshot, items: list):
+        """Create and add the entities of the items."""
+        async_add_entities, factory = self._platforms[category]
+        new_entities = []
+        for item in items:
+            entity = factory(item, snapshot)
+            self._entities[category][item.act_id] = entity
+            new_entities.append(entity)
+        async_add_entities(new_entities)
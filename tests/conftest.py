@@ -0,0 +1,90 @@
+"""Fixtures running the integration against the local eti/domo simulator.
+
+Run the tests from the root of the repository, with Home Assistant installed::
+
+    python -m pytest -q
+"""
+import asyncio
+import inspect
+
+import aiohttp
+import pytest
+
+from benchmarks.bench import async_setup_hass
+from benchmarks.simulator import DomoSimulator
+from custom_components.came.api import DomoClient
+from custom_components.came.metrics import RequestMetrics
+
+# Devices of the simulated installation, enough for a few items of every category
+DEVICES = 20
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """Run the coroutine tests in the event loop of the loop fixture."""
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+
+    arguments = {
+        name: pyfuncitem.funcargs[name]
+        for name in inspect.signature(pyfuncitem.obj).parameters
+    }
+    pyfuncitem.funcargs["loop"].run_until_complete(pyfuncitem.obj(**arguments))
+    return True
+
+
+def pytest_collection_modifyitems(items):
+    """Give every coroutine test the event loop it runs in."""
+    for item in items:
+        if inspect.iscoroutinefunction(getattr(item, "obj", None)):
+            item.fixturenames.append("loop")
+
+
+@pytest.fixture
+def loop():
+    """Return a new event loop, closed after the test."""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.run_until_complete(loop.shutdown_asyncgens())
+    loop.close()
+    asyncio.set_event_loop(None)
+
+
+@pytest.fixture
+def server(loop):
+    """Start a simulator, return it with the host:port to connect to."""
+    simulator = DomoSimulator(DEVICES)
+    runner, host = loop.run_until_complete(simulator.async_start())
+    yield simulator, host
+    loop.run_until_complete(runner.cleanup())
+
+
+@pytest.fixture
+def simulator(server):
+    """Return the running simulator."""
+    return server[0]
+
+
+@pytest.fixture
+def client(loop, server):
+    """Return a client logged in to the simulator, without scheduler nor cache."""
+    _, host = server
+    session = loop.run_until_complete(_async_create_session())
+    client = DomoClient(session, host, metrics=RequestMetrics())
+    assert loop.run_until_complete(client.login("admin", "admin"))
+    yield client
+    loop.run_until_complete(session.close())
+
+
+@pytest.fixture
+def hass(loop, tmp_path):
+    """Return a Home Assistant instance able to load the integration."""
+    hass = loop.run_until_complete(async_setup_hass(str(tmp_path)))
+    yield hass
+    loop.run_until_complete(hass.async_stop(force=True))
+
+
+async def _async_create_session():
+    """Create the http session inside the event loop."""
+    return aiohttp.ClientSession()
@@ -0,0 +1,42 @@
+"""Tests of the session handling of the client."""
+import asyncio
+
+import pytest
+
+from custom_components.came.api import RequestError
+
+
+async def test_relogin_when_session_expired(simulator, client):
+    """An expired session is renewed and the request replayed once."""
+    simulator._sessions.clear()
+
+    response = await client.list_request("relays_list_req")
+
+    assert len(response["array"]) == len(simulator.relays)
+    assert simulator.requests["sl_registration_req"] == 2
+    assert simulator.requests["relays_list_req"] == 2
+    assert client._metrics.relogins == 1
+
+
+async def test_single_relogin_for_concurrent_requests(simulator, client):
+    """The requests refused together share the same new session."""
+    simulator._sessions.clear()
+
+    await asyncio.gather(
+        client.list_request("relays_list_req"),
+        client.list_request("analogin_list_req"),
+        client.list_request("thermo_list_req"),
+    )
+
+    assert simulator.requests["sl_registration_req"] == 2
+
+
+async def test_refused_command_not_replayed(simulator, client):
+    """A request refused for another reason than the session fails at once."""
+    # the simulator does not know the cameras
+    with pytest.raises(RequestError):
+        await client.list_request("tvcc_cameras_list_req")
+
+    assert simulator.requests["sl_registration_req"] == 1
+    assert simulator.requests["tvcc_cameras_list_req"] == 1
+    assert client._metrics.relogins == 0
@@ -0,0 +1,82 @@
+"""Tests of the batches of changes sent to the thermo zones."""
+import asyncio
+
+import pytest
+
+from custom_components.came.coordinator import CameCoordinator
+from custom_components.came.thermo import ThermoController
+
+
+@pytest.fixture
+def sent(simulator, monkeypatch):
+    """Return the season and zone requests received by the simulator, in order."""
+    sent = []
+    season_req = simulator._thermo_season_req
+    zone_config_req = simulator._thermo_zone_config_req
+
+    def thermo_season_req(appl_msg):
+        sent.append(("season", appl_msg["season"]))
+        return season_req(appl_msg)
+
+    def thermo_zone_config_req(appl_msg):
+        sent.append(("zone", appl_msg["act_id"], appl_msg["mode"], appl_msg["set_point"]))
+        return zone_config_req(appl_msg)
+
+    monkeypatch.setattr(simulator, "_thermo_season_req", thermo_season_req)
+    monkeypatch.setattr(simulator, "_thermo_zone_config_req", thermo_zone_config_req)
+    return sent
+
+
+async def _async_setup(hass, client):
+    """Return a controller of the thermo zones, with their coordinator refreshed."""
+    coordinator = CameCoordinator(hass, client, "thermoregulation", 30)
+    await coordinator.async_refresh()
+    return ThermoController(hass, client, {"thermoregulation": coordinator})
+
+
+async def test_conflicting_seasons_sent_in_order(hass, simulator, client, sent):
+    """A change asking for another season sends the queued batch first."""
+    thermo = await _async_setup(hass, client)
+    first, second = list(simulator.thermoregulation)[:2]
+
+    await asyncio.gather(
+        thermo.async_configure(first, "summer", 1),
+        thermo.async_configure(second, "winter", 1),
+    )
+    # the futures are resolved before the refresh ending every batch
+    await hass.async_block_till_done()
+
+    set_point = simulator.thermoregulation[first]["set_point"]
+    assert sent == [
+        ("season", "summer"),
+        ("zone", first, 1, set_point),
+        ("season", "winter"),
+        ("zone", second, 1, set_point),
+    ]
+    assert simulator.season == "winter"
+
+
+async def test_same_season_not_sent(hass, simulator, client, sent):
+    """The season is sent only when it differs from the current one."""
+    thermo = await _async_setup(hass, client)
+    act_id = next(iter(simulator.thermoregulation))
+
+    await thermo.async_configure(act_id, simulator.season, 0)
+    await hass.async_block_till_done()
+
+    assert [request[0] for request in sent] == ["zone"]
+
+
+async def test_changes_of_a_zone_merged(hass, simulator, client, sent):
+    """The changes of a zone issued in the same window become one request."""
+    thermo = await _async_setup(hass, client)
+    act_id = next(iter(simulator.thermoregulation))
+
+    await asyncio.gather(
+        thermo.async_configure(act_id, mode=1),
+        thermo.async_configure(act_id, set_point=22.5),
+    )
+    await hass.async_block_till_done()
+
+    assert sent == [("zone", act_id, 1, 225)]
+    assert thermo._snapshot.get(act_id).set_point == 22.5
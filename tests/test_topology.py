@@ -0,0 +1,84 @@
+"""Tests of the reconciliation of the entities with the lists of the server."""
+from custom_components.came.api import DomoClient
+from custom_components.came.snapshot import DomoSnapshot
+from custom_components.came.topology import REMOVE_AFTER_CHECKS, CameTopology
+
+
+class FakeEntity:
+    """Entity of an item, never added to Home Assistant."""
+
+    def __init__(self, item, snapshot):
+        """Init the entity of the item."""
+        self.entity_id = None
+        self.name = item.name
+        self.removed = False
+
+    def async_rename(self, name):
+        """Take the new name of the item."""
+        self.name = name
+
+    async def async_remove(self):
+        """Remember the entity was removed."""
+        self.removed = True
+
+
+async def _async_fetch(client, category):
+    """Return the snapshot of the category fetched from the simulator."""
+    response = await client.list_request(DomoClient.available_commands[category])
+    return DomoSnapshot(category, response["array"])
+
+
+async def _async_setup(hass, simulator, client):
+    """Return the topology of the relays of the simulator and the entities it adds."""
+    topology = CameTopology(hass, simulator.serial)
+    entities = []
+    topology.async_add_platform(
+        "relays", await _async_fetch(client, "relays"), entities.extend, FakeEntity
+    )
+    return topology, entities
+
+
+async def test_removed_after_missing_checks(hass, simulator, client):
+    """A missing item keeps its entity until it is missing from enough checks in a row."""
+    topology, entities = await _async_setup(hass, simulator, client)
+    simulator.relays.pop(next(iter(simulator.relays)))
+    entity = entities[0]
+
+    for _ in range(REMOVE_AFTER_CHECKS - 1):
+        await topology.async_reconcile("relays", await _async_fetch(client, "relays"))
+        assert not entity.removed
+
+    await topology.async_reconcile("relays", await _async_fetch(client, "relays"))
+    assert entity.removed
+    assert not any(other.removed for other in entities[1:])
+
+
+async def test_returning_item_is_kept(hass, simulator, client):
+    """An item back in the list starts counting its missing checks again."""
+    topology, entities = await _async_setup(hass, simulator, client)
+    act_id = next(iter(simulator.relays))
+    relay = simulator.relays[act_id]
+    missing = [False] * (REMOVE_AFTER_CHECKS - 1)
+
+    for present in missing + [True] + missing:
+        if present:
+            simulator.relays[act_id] = relay
+        else:
+            simulator.relays.pop(act_id, None)
+        await topology.async_reconcile("relays", await _async_fetch(client, "relays"))
+
+    assert not entities[0].removed
+
+
+async def test_added_and_renamed(hass, simulator, client):
+    """New items get their entity and renamed ones take the new name."""
+    topology, entities = await _async_setup(hass, simulator, client)
+    existing = len(entities)
+
+    act_id = next(iter(simulator.relays))
+    simulator.relays[act_id]["name"] = "Garden pump"
+    simulator.relays[1000] = dict(simulator.relays[act_id], act_id=1000, name="Gate")
+    await topology.async_reconcile("relays", await _async_fetch(client, "relays"))
+
+    assert entities[0].name == "Garden pump"
+    assert [entity.name for entity in entities[existing:]] == ["Gate"]